@@ -1,7 +1,12 @@
 import os
+import sys
 import struct
+try:
+    from .checksums import Manifest
+except ImportError:
+    from checksums import Manifest
 
-def convert_file(input_file, entry_count, original_format, target_format):
+def convert_file(input_file, entry_count, original_format, target_format, manifest=None):
     formats = {
         'double': ('d', '.d64'),
         'float': ('f', '.f32'),
@@ -22,6 +27,8 @@ def convert_file(input_file, entry_count, original_format, target_format):
     output_filename += "_converted"+ target_extension
 
     with open(input_file, 'rb') as infile, open(output_filename, 'wb') as outfile:
+        if manifest is not None:
+            outfile = manifest.hasher(output_filename).wrap(outfile)
         for _ in range(entry_count):
             original_value = infile.read(struct.calcsize(original_format_char))
             if not original_value:
@@ -34,10 +41,32 @@ def convert_file(input_file, entry_count, original_format, target_format):
 
     print("Conversion completed. Output file:", output_filename)
 
-if __name__ == "__main__":
-    input_file = input("Enter the path to the input file: ")
-    entry_count = int(input("Enter the number of entries: "))
-    original_format = input("Enter the original format (double, float, short, ushort, int, uint): ")
-    target_format = input("Enter the target format (double, float, short, ushort, int, uint): ")
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    manifest = None
+    if '--manifest' in argv:
+        i = argv.index('--manifest')
+        if i + 1 >= len(argv):
+            print("--manifest needs a path")
+            sys.exit(1)
+        manifest = Manifest(argv[i + 1])
+        argv = argv[:i] + argv[i + 2:]
+    if len(argv) == 4:
+        input_file, entry_count, original_format, target_format = argv
+        entry_count = int(entry_count)
+    elif not argv:
+        input_file = input("Enter the path to the input file: ")
+        entry_count = int(input("Enter the number of entries: "))
+        original_format = input("Enter the original format (double, float, short, ushort, int, uint): ")
+        target_format = input("Enter the target format (double, float, short, ushort, int, uint): ")
+    else:
+        print("Usage: python byte_converter.py [input_file entry_count original_format target_format] [--manifest PATH]")
+        sys.exit(1)
+
+    convert_file(input_file, entry_count, original_format, target_format, manifest)
+    if manifest is not None:
+        manifest.save()
 
-    convert_file(input_file, entry_count, original_format, target_format)
+if __name__ == "__main__":
+    main()
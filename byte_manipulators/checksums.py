@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Bytes covered by one checksum; chunks are verified independently (and in parallel)
+CHUNK_SIZE = 1 << 22
+
+# xxhash is optional; without it the stdlib sha256 is used (hardware accelerated on most CPUs)
+XXHASH_ALGORITHMS = ('xxh3_64', 'xxh3_128', 'xxh64', 'xxh32')
+
+
+def default_algorithm():
+    try:
+        import xxhash  # noqa: F401
+        return 'xxh3_64'
+    except ImportError:
+        return 'sha256'
+
+
+def new_hash(algorithm):
+    """Return a fresh hash object for an xxhash or hashlib algorithm name."""
+    if algorithm in XXHASH_ALGORITHMS:
+        import xxhash
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+
+class ChunkHasher:
+    """Hash a byte stream in fixed-size chunks as it is written.
+
+    Feed it the same bytes (in the same order) that go to the output file; finish()
+    returns the manifest entry {'size': ..., 'chunk_size': ..., 'chunks': [hex digest per chunk]}.
+    A hasher that has not been fed yet can be pickled and sent to a worker process.
+    """
+
+    def __init__(self, algorithm=None, chunk_size=CHUNK_SIZE):
+        self.algorithm = algorithm or default_algorithm()
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.chunks = []
+        self._hash = None
+        self._filled = 0
+
+    def update(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        view = memoryview(data).cast('B')
+        if self._hash is None:
+            self._hash = new_hash(self.algorithm)
+        while len(view):
+            take = min(len(view), self.chunk_size - self._filled)
+            self._hash.update(view[:take])
+            view = view[take:]
+            self._filled += take
+            self.size += take
+            if self._filled == self.chunk_size:
+                self.chunks.append(self._hash.hexdigest())
+                self._hash = new_hash(self.algorithm)
+                self._filled = 0
+
+    def wrap(self, fh):
+        """Return a file object that writes to fh and hashes what is written."""
+        return HashingWriter(fh, self)
+
+    def finish(self):
+        if self._filled or not self.chunks:
+            self.chunks.append((self._hash or new_hash(self.algorithm)).hexdigest())
+            self._hash = new_hash(self.algorithm)
+            self._filled = 0
+        return {'size': self.size, 'chunk_size': self.chunk_size, 'chunks': self.chunks}
+
+
+class HashingWriter:
+    """File object wrapper that feeds everything written to a ChunkHasher.
+
+    Text is hashed as UTF-8 without newline translation, so text files must be
+    opened with newline='' and encoding='utf-8' to match the bytes on disk.
+    """
+
+    def __init__(self, fh, hasher):
+        self.fh = fh
+        self.hasher = hasher
+
+    def write(self, data):
+        self.hasher.update(data)
+        return self.fh.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.fh, name)
+
+
+class Manifest:
+    """Checksums of the files written during one run, saved as JSON next to them.
+
+    Paths are stored relative to the manifest. An existing manifest is extended
+    with its own algorithm and chunk size, so several runs can share one file.
+    """
+
+    def __init__(self, path, algorithm=None, chunk_size=None):
+        self.path = path
+        self.algorithm = algorithm or default_algorithm()
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.files = {}
+        self._hashers = {}
+        if os.path.isfile(path):
+            with open(path) as fp:
+                existing = json.load(fp)
+            for key, requested in (('algorithm', algorithm), ('chunk_size', chunk_size)):
+                if requested and requested != existing[key]:
+                    raise ValueError(f"{path} uses {key} {existing[key]}, not {requested}")
+            if existing['algorithm'] in XXHASH_ALGORITHMS and default_algorithm() != 'xxh3_64':
+                raise ValueError(f"{path} uses {existing['algorithm']}, install xxhash to extend it")
+            self.algorithm = existing['algorithm']
+            self.chunk_size = existing['chunk_size']
+            self.files = existing.get('files', {})
+
+    def _key(self, file_path):
+        base = os.path.dirname(os.path.abspath(self.path))
+        return os.path.relpath(os.path.abspath(file_path), base).replace(os.sep, '/')
+
+    def hasher(self, file_path, register=True, chunk_size=None):
+        """Return a ChunkHasher for file_path.
+
+        A registered hasher is finished and recorded on save(); otherwise pass the
+        result of its finish() (e.g. returned by a worker process) to add().
+        """
+        hasher = ChunkHasher(self.algorithm, chunk_size or self.chunk_size)
+        if register:
+            self._hashers[self._key(file_path)] = hasher
+        return hasher
+
+    def add(self, file_path, entry):
+        """Record an entry computed elsewhere (e.g. by ChunkHasher.finish() in a worker process)."""
+        entry = dict(entry)
+        # Only files hashed with a different chunk size than the manifest's keep their own
+        if entry.get('chunk_size') == self.chunk_size:
+            del entry['chunk_size']
+        self.files[self._key(file_path)] = entry
+
+    def discard(self, file_path):
+        """Forget file_path, e.g. after writing it failed."""
+        key = self._key(file_path)
+        self._hashers.pop(key, None)
+        self.files.pop(key, None)
+
+    def save(self):
+        hashers, self._hashers = self._hashers, {}
+        base = os.path.dirname(os.path.abspath(self.path))
+        for key, hasher in hashers.items():
+            self.add(os.path.join(base, key), hasher.finish())
+        manifest = {'algorithm': self.algorithm, 'chunk_size': self.chunk_size, 'files': self.files}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(manifest, fp, indent=1)
+        os.replace(tmp_path, self.path)
+        print(f"Checksums of {len(self.files)} file(s) written to {self.path}")
+        return self.path
+
+
+def _hash_chunks(job):
+    """Worker: hash a run of consecutive chunks of one file."""
+    path, algorithm, chunk_size, first, count = job
+    digests = []
+    with open(path, 'rb') as fh:
+        fh.seek(first * chunk_size)
+        for _ in range(count):
+            h = new_hash(algorithm)
+            remaining = chunk_size
+            while remaining:
+                data = fh.read(min(remaining, CHUNK_SIZE))
+                if not data:
+                    break
+                h.update(data)
+                remaining -= len(data)
+            digests.append(h.hexdigest())
+    return path, first, digests
+
+
+def verify_manifest(manifest_path, workers=None, chunks_per_job=16):
+    """Check the files listed in a manifest, hashing their chunks in parallel.
+
+    Each worker job covers about chunks_per_job default-sized chunks of one file.
+
+    Returns a list of problem descriptions (empty if every file matches).
+    """
+    with open(manifest_path) as fp:
+        manifest = json.load(fp)
+    algorithm = manifest['algorithm']
+    base = os.path.dirname(os.path.abspath(manifest_path))
+
+    problems = []
+    expected = {}
+    jobs = []
+    for name, entry in manifest['files'].items():
+        path = os.path.join(base, name)
+        if not os.path.isfile(path):
+            problems.append(f"{name}: missing")
+            continue
+        size = os.path.getsize(path)
+        if size != entry['size']:
+            problems.append(f"{name}: size {size}, expected {entry['size']}")
+            continue
+        # Files written in parallel pieces (e.g. 4D raw frames) carry their own chunk size
+        chunk_size = entry.get('chunk_size', manifest['chunk_size'])
+        expected[path] = (name, entry['chunks'], chunk_size)
+        per_job = max(1, chunks_per_job * CHUNK_SIZE // chunk_size)
+        for first in range(0, len(entry['chunks']), per_job):
+            jobs.append((path, algorithm, chunk_size, first, min(per_job, len(entry['chunks']) - first)))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for path, first, digests in executor.map(_hash_chunks, jobs):
+            name, chunks, chunk_size = expected[path]
+            for i, digest in enumerate(digests, first):
+                if digest != chunks[i]:
+                    problems.append(f"{name}: chunk {i} (bytes {i * chunk_size}..{min((i + 1) * chunk_size, os.path.getsize(path))}) differs")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verify files against a checksum manifest written with --manifest')
+    parser.add_argument('manifest', help='manifest (.json) to check')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    problems = verify_manifest(args.manifest, args.jobs)
+    for problem in problems:
+        print(problem)
+    if problems:
+        print(f"FAILED: {len(problems)} problem(s)")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
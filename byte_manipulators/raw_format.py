@@ -0,0 +1,60 @@
+import os
+import re
+
+# Map dtype string to numpy code (swap_endian.py names plus the tif2raw.py file name spellings)
+RAW_DTYPES = {
+    'float32': 'f4',
+    'float64': 'f8',
+    'double64': 'f8',
+    'int8': 'i1',
+    'char': 'i1',
+    'int16': 'i2',
+    'int32': 'i4',
+    'int': 'i4',
+    'int64': 'i8',
+    'uint8': 'u1',
+    'uint16': 'u2',
+    'uint32': 'u4',
+    'uint': 'u4',
+    'uint64': 'u8',
+}
+
+# '<name>_XxYxZ_<dtype>.raw', dims fastest axis first
+RAW_NAME_RE = re.compile(r'_(\d+)x(\d+)x(\d+)_([A-Za-z0-9]+)\.raw$', re.IGNORECASE)
+
+
+def parse_raw_name(raw_path):
+    """Read ((X, Y, Z), dtype name) from a '<name>_XxYxZ_<dtype>.raw' file name, or None if it does not match."""
+    match = RAW_NAME_RE.search(os.path.basename(raw_path))
+    if not match:
+        return None
+    return tuple(int(v) for v in match.groups()[:3]), match.group(4).lower()
+
+
+def parse_roi(text):
+    """Parse 'z0:z1,y0:y1,x0:x1' into three slice objects (empty bounds mean full range)."""
+    if not text:
+        return (slice(None),) * 3
+    parts = text.split(',')
+    if len(parts) != 3:
+        raise ValueError(f"ROI must have three ranges 'z0:z1,y0:y1,x0:x1', got '{text}'")
+    roi = []
+    for part in parts:
+        bounds = part.split(':')
+        if len(bounds) != 2:
+            raise ValueError(f"Invalid ROI range '{part}' in '{text}'")
+        start, stop = (int(b) if b.strip() else None for b in bounds)
+        roi.append(slice(start, stop))
+    return tuple(roi)
+
+
+def parse_stride(text):
+    """Parse 'N' or 'Z,Y,X' into a (z, y, x) stride tuple."""
+    if not text:
+        return (1, 1, 1)
+    values = [int(v) for v in str(text).split(',')]
+    if len(values) == 1:
+        values = values * 3
+    if len(values) != 3 or min(values) < 1:
+        raise ValueError(f"Stride must be a positive 'N' or 'Z,Y,X', got '{text}'")
+    return tuple(values)
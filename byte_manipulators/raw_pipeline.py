@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+try:
+    from .checksums import Manifest
+    from .raw_format import RAW_DTYPES, RAW_NAME_RE, parse_raw_name, parse_roi, parse_stride
+except ImportError:
+    from checksums import Manifest
+    from raw_format import RAW_DTYPES, RAW_NAME_RE, parse_raw_name, parse_roi, parse_stride
+
+# Bytes of the largest array held per slab (input or output, or the float64 scratch copy)
+SLAB_BYTES = 1 << 24
+
+# Keys of a spec file (same names as the command line options)
+SPEC_KEYS = ('input', 'output', 'dims', 'dtype', 'endian', 'swap', 'cast', 'scale', 'flip', 'crop', 'stride', 'manifest')
+
+
+def plan_axes(shape, crop=None, stride=None, flip=''):
+    """Combine crop, stride and flip into one range of input indices per (z, y, x) axis.
+
+    Crop and stride are given in input coordinates; flipping reverses the selected
+    range, so all three cost nothing beyond picking which input samples to read.
+    """
+    crop = parse_roi(crop) if isinstance(crop, str) or crop is None else crop
+    stride = parse_stride(stride) if not isinstance(stride, tuple) else stride
+    flip = (flip or '').lower()
+    if any(axis not in 'zyx' for axis in flip):
+        raise ValueError(f"Flip axes must be letters from 'zyx', got '{flip}'")
+    ranges = []
+    for axis, (s, step, n) in enumerate(zip(crop, stride, shape)):
+        selected = range(*slice(s.start, s.stop, step).indices(n))
+        if not selected:
+            raise ValueError(f"Crop selects nothing along {'zyx'[axis]}")
+        ranges.append(selected[::-1] if 'zyx'[axis] in flip else selected)
+    return tuple(ranges)
+
+
+def _as_slice(r):
+    """Slice selecting the indices of range r (stop may run past 0 when stepping down)."""
+    return slice(r.start, r.stop if r.stop >= 0 else None, r.step)
+
+
+def _needs_float64(in_dtype, out_dtype, scale=None):
+    """True if convert_block goes through a float64 copy (scaling, or rounding floats to integers)."""
+    return scale is not None or (in_dtype.kind == 'f' and out_dtype.kind in 'iu')
+
+
+def convert_block(block, out_dtype, scale=None):
+    """Cast a block to out_dtype in one step.
+
+    With scale=(lo, hi) values are mapped linearly from lo..hi onto the full range
+    of an integer out_dtype (or onto 0..1 for floats). Conversions to integers
+    round and clip to the target range instead of wrapping around. Only scaling and
+    float to integer casts need a float64 copy of the block.
+    """
+    if not _needs_float64(block.dtype, out_dtype, scale):
+        if out_dtype.kind == 'f' or np.can_cast(block.dtype, out_dtype, 'safe'):
+            return block.astype(out_dtype)
+        # Narrowing integer cast: clip within the input type, then cast
+        info, in_info = np.iinfo(out_dtype), np.iinfo(block.dtype)
+        return np.clip(block, max(info.min, in_info.min), min(info.max, in_info.max)).astype(out_dtype)
+    if out_dtype.kind in 'iu':
+        info = np.iinfo(out_dtype)
+        t_min, t_max = float(info.min), float(info.max)
+    else:
+        t_min, t_max = 0.0, 1.0
+    values = block.astype(np.float64)
+    if scale is not None:
+        lo, hi = (float(v) for v in scale)
+        if hi <= lo:
+            raise ValueError(f"Scale range must be increasing, got {lo} .. {hi}")
+        values -= lo
+        values *= (t_max - t_min) / (hi - lo)
+        values += t_min
+    if out_dtype.kind in 'iu':
+        np.rint(values, out=values)
+        np.clip(values, t_min, t_max, out=values)
+    return values.astype(out_dtype)
+
+
+def run_pipeline(in_path, out_path, dims, dtype, endian='little', swap=False, cast=None, scale=None,
+                 flip='', crop=None, stride=None, slab_bytes=SLAB_BYTES, hasher=None):
+    """Apply byte swap, cast/quantize, flip, crop and stride to a raw volume in one pass.
+
+    The input (X, Y, Z dims, x fastest) is memory-mapped and only the selected
+    samples are read, slab by slab; each slab goes through all operations in memory
+    and is written once. A hasher (checksums.ChunkHasher) is fed each slab as it is written.
+
+    Returns the output shape as (z, y, x).
+    """
+    if dtype not in RAW_DTYPES or (cast is not None and cast not in RAW_DTYPES):
+        raise ValueError(f"Unsupported dtype, choose from {', '.join(RAW_DTYPES)}")
+    if endian not in ('little', 'big'):
+        raise ValueError("Endianness must be 'little' or 'big'")
+    if os.path.abspath(in_path) == os.path.abspath(out_path):
+        raise ValueError("Output file must differ from the input file")
+    in_char = '<' if endian == 'little' else '>'
+    out_char = {'<': '>', '>': '<'}[in_char] if swap else in_char
+    in_dtype = np.dtype(in_char + RAW_DTYPES[dtype])
+    out_dtype = np.dtype(out_char + RAW_DTYPES[cast or dtype])
+
+    X, Y, Z = (int(n) for n in dims)
+    expected = X * Y * Z * in_dtype.itemsize
+    if os.path.getsize(in_path) != expected:
+        raise ValueError(f"Data size mismatch! Expected {expected} bytes, got {os.path.getsize(in_path)}.")
+
+    zs, ys, xs = plan_axes((Z, Y, X), crop, stride, flip)
+    out_shape = (len(zs), len(ys), len(xs))
+    voxel_bytes = 8 if _needs_float64(in_dtype, out_dtype, scale) else max(in_dtype.itemsize, out_dtype.itemsize)
+    step = max(1, slab_bytes // (len(ys) * len(xs) * voxel_bytes))
+    source = np.memmap(in_path, dtype=in_dtype, mode='r', shape=(Z, Y, X))
+    with open(out_path, 'wb') as f:
+        for z0 in range(0, len(zs), step):
+            block = source[_as_slice(zs[z0:z0 + step]), _as_slice(ys), _as_slice(xs)]
+            converted = convert_block(block, out_dtype, scale)
+            if hasher is not None:
+                hasher.update(converted)
+            converted.tofile(f)
+    del source
+    return out_shape
+
+
+def default_output_name(filename, out_shape, out_type):
+    """'<name>_XxYxZ_<dtype>.raw' inputs keep the naming with the new dims and type, anything else gets a 'P_' prefix."""
+    base = os.path.basename(filename)
+    match = RAW_NAME_RE.search(base)
+    if match:
+        dims = 'x'.join(str(n) for n in out_shape[::-1])
+        return base[:match.start()] + f"_p_{dims}_{out_type}.raw"
+    return "P_" + base
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Swap byte order, cast, flip, crop and subsample a raw volume in a single pass',
+        epilog="Example: python raw_pipeline.py vol_512x512x200_uint16.raw --swap --cast uint8 --scale 0 4095 "
+               "--flip z --crop 10:190,:,: --stride 2")
+    parser.add_argument('input', nargs='?', help='input raw file (x fastest)')
+    parser.add_argument('-o', '--output', help='output file (default: <name>_p_XxYxZ_<dtype>.raw or P_<filename>)')
+    parser.add_argument('--spec', help='JSON file with any of the options below (command line options take precedence), '
+                                       f'keys: {", ".join(SPEC_KEYS)}')
+    parser.add_argument('--dims', type=int, nargs=3, metavar=('X', 'Y', 'Z'),
+                        help='volume dimensions (default: from a _XxYxZ_<dtype>.raw file name)')
+    parser.add_argument('--dtype', choices=sorted(RAW_DTYPES), help='input data type (default: from the file name)')
+    parser.add_argument('--endian', choices=['little', 'big'], default='little', help='byte order of the input (default: little)')
+    parser.add_argument('--swap', action='store_true', default=False, help='write the opposite byte order')
+    parser.add_argument('--cast', choices=sorted(RAW_DTYPES), help='output data type (rounded and clipped to its range)')
+    parser.add_argument('--scale', type=float, nargs=2, metavar=('LO', 'HI'),
+                        help='with --cast, map LO..HI linearly onto the full output range (0..1 for floats)')
+    parser.add_argument('--flip', default='', help="axes to reverse, e.g. 'z' or 'xy'")
+    parser.add_argument('--crop', metavar='z0:z1,y0:y1,x0:x1', help='only keep this sub-box (input coordinates)')
+    parser.add_argument('--stride', metavar='N|Z,Y,X', help='keep every N-th sample along each axis')
+    parser.add_argument('--manifest', metavar='PATH', help='record chunked checksums of the output in this JSON manifest')
+    args = parser.parse_args(argv)
+
+    if args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+        unknown = set(spec) - set(SPEC_KEYS)
+        if unknown:
+            parser.error(f"unknown keys in {args.spec}: {', '.join(sorted(unknown))}")
+        if 'stride' in spec:
+            spec['stride'] = str(spec['stride'])
+        parser.set_defaults(**spec)
+        args = parser.parse_args(argv)
+    if not args.input:
+        parser.error('no input file given')
+
+    dims, dtype = args.dims, args.dtype
+    parsed = parse_raw_name(args.input)
+    if parsed:
+        dims = dims or list(parsed[0])
+        dtype = dtype or parsed[1]
+    if dims is None or dtype is None:
+        parser.error('--dims and --dtype are required unless the file is named <name>_XxYxZ_<dtype>.raw')
+
+    try:
+        zs, ys, xs = plan_axes(tuple(dims[::-1]), args.crop, args.stride, args.flip)
+        out_type = args.cast or dtype
+        out_filename = args.output or default_output_name(args.input, (len(zs), len(ys), len(xs)), out_type)
+        manifest = Manifest(args.manifest) if args.manifest else None
+        out_shape = run_pipeline(args.input, out_filename, dims, dtype, args.endian, args.swap, args.cast,
+                                 args.scale, args.flip, args.crop, args.stride,
+                                 hasher=manifest.hasher(out_filename) if manifest else None)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"Saved {out_shape[2]}x{out_shape[1]}x{out_shape[0]} {out_type} volume as {out_filename}")
+    if manifest:
+        manifest.save()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+try:
+    from .raw_format import RAW_DTYPES, RAW_NAME_RE
+except ImportError:
+    from raw_format import RAW_DTYPES, RAW_NAME_RE
+
+# Edge length of the cubic tiles copied at once (64^3 float64 voxels = 2 MiB)
+BLOCK_EDGE = 64
+
+
+def parse_order(order):
+    """Turn an axis order like 'zxy' (slowest to fastest) into a permutation of the (z, y, x) array axes."""
+    order = order.lower()
+    if sorted(order) != ['x', 'y', 'z']:
+        raise ValueError(f"Axis order must be a permutation of 'zyx', got '{order}'")
+    return tuple('zyx'.index(axis) for axis in order)
+
+
+def parse_flip(flip):
+    """Turn axis letters like 'xz' into the set of (z, y, x) array axes to reverse."""
+    flip = (flip or '').lower()
+    if any(axis not in 'zyx' for axis in flip):
+        raise ValueError(f"Flip axes must be letters from 'zyx', got '{flip}'")
+    return frozenset('zyx'.index(axis) for axis in flip)
+
+
+def _blocks(n, edge):
+    return [(start, min(start + edge, n)) for start in range(0, n, edge)]
+
+
+def _reorder_tiles(job):
+    """Worker: copy the tiles of one (axis 0, axis 1) output block row."""
+    in_path, out_path, in_shape, dtype, perm, flips, edge, out_range0, out_range1 = job
+    out_shape = tuple(in_shape[axis] for axis in perm)
+    src = np.memmap(in_path, dtype=dtype, mode='r', shape=in_shape)
+    dst = np.memmap(out_path, dtype=dtype, mode='r+', shape=out_shape)
+    for out_range2 in _blocks(out_shape[2], edge):
+        out_ranges = (out_range0, out_range1, out_range2)
+        in_slices = [None] * 3
+        for out_axis, (o0, o1) in enumerate(out_ranges):
+            in_axis = perm[out_axis]
+            if in_axis in flips:
+                n = in_shape[in_axis]
+                in_slices[in_axis] = slice(n - o1, n - o0)
+            else:
+                in_slices[in_axis] = slice(o0, o1)
+        tile = np.transpose(src[tuple(in_slices)], perm)
+        flipped = [out_axis for out_axis in range(3) if perm[out_axis] in flips]
+        if flipped:
+            tile = np.flip(tile, flipped)
+        dst[tuple(slice(o0, o1) for o0, o1 in out_ranges)] = tile
+    dst.flush()
+    del src, dst
+
+
+def reorder_axes(in_path, out_path, shape, dtype, order='zyx', flip='', block_edge=BLOCK_EDGE, workers=None):
+    """Permute (and optionally flip) the axes of a raw volume without loading it.
+
+    in_path holds a C-ordered (Z, Y, X) volume (x fastest). The output is written in
+    the axis order given slowest to fastest, e.g. 'xyz' makes z the fastest axis
+    and 'zxy' stores transposed (Y, X) slices. Cubic tiles of block_edge voxels are
+    read from the memory-mapped input, transposed in cache and written into the
+    preallocated output; tile rows are spread over worker processes.
+
+    Returns the output shape (slowest to fastest).
+    """
+    perm = parse_order(order)
+    flips = parse_flip(flip)
+    in_shape = tuple(int(n) for n in shape)
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(in_shape)) * dtype.itemsize
+    if os.path.getsize(in_path) != nbytes:
+        raise ValueError(f"Data size mismatch! Expected {nbytes} bytes for {in_shape} {dtype}, "
+                         f"got {os.path.getsize(in_path)}.")
+    if os.path.abspath(in_path) == os.path.abspath(out_path):
+        raise ValueError("Output file must differ from the input file")
+
+    out_shape = tuple(in_shape[axis] for axis in perm)
+    with open(out_path, 'wb') as f:
+        f.truncate(nbytes)
+
+    jobs = [(in_path, out_path, in_shape, dtype.str, perm, flips, block_edge, r0, r1)
+            for r0, r1 in itertools.product(_blocks(out_shape[0], block_edge), _blocks(out_shape[1], block_edge))]
+    if workers == 1 or len(jobs) == 1:
+        for job in jobs:
+            _reorder_tiles(job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(_reorder_tiles, jobs, chunksize=max(1, len(jobs) // 64)):
+                pass
+    return out_shape
+
+
+def default_output_name(filename, out_shape, order):
+    """'<name>_XxYxZ_<dtype>.raw' inputs keep the naming with the order and new dims (fastest first), anything else gets an 'RO_' prefix."""
+    base = os.path.basename(filename)
+    match = RAW_NAME_RE.search(base)
+    if match:
+        dims = 'x'.join(str(n) for n in out_shape[::-1])
+        return base[:match.start()] + f"_{order}_{dims}_{match.group(4)}.raw"
+    return f"RO_{order}_" + base
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Reorder (and flip) the axes of a raw (Z, Y, X) volume out of core',
+        epilog='Example: python reorder_axes.py 128 128 64 float32 data.bin --order xyz --flip z')
+    parser.add_argument('X', type=int)
+    parser.add_argument('Y', type=int)
+    parser.add_argument('Z', type=int)
+    parser.add_argument('dtype', choices=sorted(RAW_DTYPES))
+    parser.add_argument('filename')
+    parser.add_argument('--order', default='zyx',
+                        help="output axis order from slowest to fastest, e.g. 'xyz' for z fastest (default: zyx)")
+    parser.add_argument('--flip', default='', help="axes to reverse, e.g. 'z' or 'xy'")
+    parser.add_argument('-o', '--output', help='output file (default: <name>_<order>_XxYxZ_<dtype>.raw for such inputs, else RO_<order>_<filename>)')
+    parser.add_argument('--block', type=int, default=BLOCK_EDGE, help=f'tile edge length in voxels (default: {BLOCK_EDGE})')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    try:
+        out_shape = tuple((args.Z, args.Y, args.X)[axis] for axis in parse_order(args.order))
+        out_filename = args.output or default_output_name(args.filename, out_shape, args.order.lower())
+        reorder_axes(args.filename, out_filename, (args.Z, args.Y, args.X), RAW_DTYPES[args.dtype],
+                     args.order, args.flip, args.block, args.jobs)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"Reordered volume ({args.order.lower()}, shape {out_shape}) saved as {out_filename}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,33 @@
 import numpy as np
 import sys
 import os
+try:
+    from .checksums import Manifest
+except ImportError:
+    from checksums import Manifest
 
-def main():
-    if len(sys.argv) != 7:
-        print("Usage: python swap_endian.py X Y Z dtype endianness filename")
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    manifest = None
+    if '--manifest' in argv:
+        i = argv.index('--manifest')
+        if i + 1 >= len(argv):
+            print("--manifest needs a path")
+            sys.exit(1)
+        manifest = Manifest(argv[i + 1])
+        argv = argv[:i] + argv[i + 2:]
+    if len(argv) != 6:
+        print("Usage: python swap_endian.py X Y Z dtype endianness filename [--manifest PATH]")
         print("Example: python swap_endian.py 128 128 64 float32 little data.bin")
         sys.exit(1)
 
-    X = int(sys.argv[1])
-    Y = int(sys.argv[2])
-    Z = int(sys.argv[3])
-    dtype = sys.argv[4].lower()
-    endianness = sys.argv[5].lower()
-    filename = sys.argv[6]
+    X = int(argv[0])
+    Y = int(argv[1])
+    Z = int(argv[2])
+    dtype = argv[3].lower()
+    endianness = argv[4].lower()
+    filename = argv[5]
 
     if endianness not in ['little', 'big']:
         print("Endianness must be 'little' or 'big'")
@@ -54,9 +68,13 @@ def main():
 
     out_filename = "SE_" + os.path.basename(filename)
     with open(out_filename, 'wb') as f:
+        if manifest is not None:
+            manifest.hasher(out_filename).update(data_swapped)
         data_swapped.tofile(f)
 
     print(f"Converted file saved as {out_filename}")
+    if manifest is not None:
+        manifest.save()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
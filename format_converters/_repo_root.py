@@ -0,0 +1,13 @@
+"""
+Make the repository root importable when a converter is run as a script.
+
+The converters use helpers from byte_manipulators; started as
+'python format_converters/<script>.py' only this directory is on sys.path.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Convert a raw volume to VTK format.
+
+The raw file is memory-mapped and copied into the (big-endian) VTK file window by
+window, so memory use does not depend on the volume size. Dimensions and data type
+are taken from the '<name>_XxYxZ_<dtype>.raw' naming used by tif2raw.py and
+tifstack2raw.py, or given on the command line.
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+try:
+    from .tifstack2VTK import VTK_BIG_ENDIAN, vtk_file_framing
+except ImportError:
+    from tifstack2VTK import VTK_BIG_ENDIAN, vtk_file_framing
+try:
+    from byte_manipulators.checksums import Manifest
+    from byte_manipulators.raw_format import RAW_DTYPES, parse_raw_name
+except ImportError:
+    import _repo_root  # noqa: F401 (run as a script)
+    from byte_manipulators.checksums import Manifest
+    from byte_manipulators.raw_format import RAW_DTYPES, parse_raw_name
+
+
+# VTK scalar type for each raw element type
+VTK_SCALAR_TYPE = {
+    'u1': "unsigned_char",
+    'i1': "char",
+    'u2': "unsigned_short",
+    'i2': "short",
+    'u4': "unsigned_int",
+    'i4': "int",
+    'f4': "float",
+    'f8': "double",
+}
+
+# Raw data type names (tif2raw/tifstack2raw and swap_endian spellings) VTK can store
+VTK_DTYPES = sorted(name for name, code in RAW_DTYPES.items() if code in VTK_SCALAR_TYPE)
+
+# Bytes converted and written per window
+STREAM_WINDOW_BYTES = 1 << 24
+
+
+def raw_to_vtk(raw_path, output_path=None, dims=None, dtype=None, spacing=(1.0, 1.0, 1.0),
+               byte_order='little', window_bytes=STREAM_WINDOW_BYTES, hasher=None):
+    """
+    Write a raw volume as a binary VTK file without loading it into memory.
+
+    Args:
+        raw_path: Path to the raw file (x fastest, then y, then z)
+        output_path: Output .vtk (legacy) or .vti (XML ImageData) path
+                     (default: raw_path with a .vtk suffix)
+        dims: (width, height, depth); taken from the file name if None
+        dtype: Data type name (see VTK_DTYPES); taken from the file name if None
+        spacing: Tuple of (x, y, z) spacing between voxels
+        byte_order: 'little' or 'big', byte order of the raw file
+        window_bytes: Approximate number of bytes converted per write
+        hasher: Optional checksums.ChunkHasher fed with the output bytes as they are written
+
+    Returns:
+        The output path
+    """
+    if dims is None or dtype is None:
+        parsed = parse_raw_name(raw_path)
+        if parsed is None:
+            raise ValueError(f"Cannot read dimensions/data type from '{raw_path}', "
+                             "expected '<name>_XxYxZ_<dtype>.raw' (or pass them explicitly)")
+        dims = dims or parsed[0]
+        dtype = dtype or parsed[1]
+    if dtype not in VTK_DTYPES:
+        raise ValueError(f"Unsupported data type '{dtype}' (choose from {', '.join(VTK_DTYPES)})")
+    if byte_order not in ('little', 'big'):
+        raise ValueError("byte_order must be 'little' or 'big'")
+    if output_path is None:
+        output_path = os.path.splitext(raw_path)[0] + '.vtk'
+
+    code = RAW_DTYPES[dtype]
+    scalar_type = VTK_SCALAR_TYPE[code]
+    in_dtype = np.dtype(('<' if byte_order == 'little' else '>') + code)
+    out_dtype = np.dtype(VTK_BIG_ENDIAN[scalar_type])
+    width, height, depth = (int(v) for v in dims)
+    count = width * height * depth
+
+    file_size = os.path.getsize(raw_path)
+    if file_size != count * in_dtype.itemsize:
+        raise ValueError(f"'{raw_path}' has {file_size} bytes, expected {count * in_dtype.itemsize} "
+                         f"for {width}x{height}x{depth} {dtype}")
+
+    print(f"Converting {raw_path}: {width}x{height}x{depth} {dtype} ({byte_order}-endian)")
+    header, footer = vtk_file_framing(output_path, width, height, depth, spacing, scalar_type)
+    source = np.memmap(raw_path, dtype=in_dtype, mode='r', shape=(count,))
+    # One reused output window: assigning into it converts to big-endian in a single copy
+    window = max(1, min(count, window_bytes // in_dtype.itemsize))
+    buffer = np.empty(window, dtype=out_dtype)
+    with open(output_path, 'wb') as f:
+        if hasher is not None:
+            f = hasher.wrap(f)
+        f.write(header)
+        for start in range(0, count, window):
+            stop = min(start + window, count)
+            chunk = buffer[:stop - start]
+            chunk[:] = source[start:stop]
+            f.write(chunk.data)
+        f.write(footer)
+    del source
+
+    print(f"VTK file written to: {output_path}")
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Convert a raw volume to VTK format',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python raw2VTK.py stack_512x512x100_uint16.raw
+  python raw2VTK.py stack_512x512x100_uint16.raw -o stack.vti -s 0.5 0.5 2.0
+  python raw2VTK.py grid.raw --dims 64 64 64 --dtype uint8
+  python raw2VTK.py SE_data.bin --dims 128 128 64 --dtype float32 --big-endian
+        """
+    )
+    parser.add_argument('input', type=str, help='Input raw file')
+    parser.add_argument('-o', '--output', type=str,
+                        help='Output .vtk or .vti file path (default: input_name.vtk)')
+    parser.add_argument('--dims', type=int, nargs=3, metavar=('X', 'Y', 'Z'),
+                        help='Volume dimensions (default: from the _XxYxZ_ part of the file name)')
+    parser.add_argument('--dtype', choices=VTK_DTYPES,
+                        help='Data type (default: from the _<dtype>.raw part of the file name)')
+    parser.add_argument('--big-endian', action='store_true',
+                        help='The raw file is big-endian (default: little-endian)')
+    parser.add_argument('-s', '--spacing', type=float, nargs=3, default=[1.0, 1.0, 1.0],
+                        metavar=('X', 'Y', 'Z'),
+                        help='Voxel spacing in X, Y, Z directions (default: 1.0 1.0 1.0)')
+    parser.add_argument('--manifest', metavar='PATH',
+                        help='Record chunked checksums of the written file in this JSON manifest')
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.input):
+        print(f"Error: Input file does not exist: {args.input}")
+        sys.exit(1)
+    manifest = Manifest(args.manifest) if args.manifest else None
+    output_path = args.output or os.path.splitext(args.input)[0] + '.vtk'
+    try:
+        raw_to_vtk(args.input, output_path, dims=args.dims, dtype=args.dtype, spacing=args.spacing,
+                   byte_order='big' if args.big_endian else 'little',
+                   hasher=manifest.hasher(output_path) if manifest else None)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if manifest:
+        manifest.save()
+
+
+if __name__ == "__main__":
+    main()
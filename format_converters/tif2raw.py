@@ -1,7 +1,20 @@
 import os
 import sys
+import argparse
+import contextlib
 import numpy as np
 import tifffile
+try:
+    from .tif_region import ChannelStack, read_tif_region
+except ImportError:
+    from tif_region import ChannelStack, read_tif_region
+try:
+    from byte_manipulators.checksums import Manifest
+    from byte_manipulators.raw_format import parse_roi, parse_stride
+except ImportError:
+    import _repo_root  # noqa: F401 (run as a script)
+    from byte_manipulators.checksums import Manifest
+    from byte_manipulators.raw_format import parse_roi, parse_stride
 
 # Mapping numpy dtype to string for filename
 DTYPE_MAP = {
@@ -19,16 +32,25 @@ def get_datatype_str(dtype):
     """Return string representation for filename based on dtype."""
     return DTYPE_MAP.get(dtype, str(dtype))
 
-def save_raw_volume(volume, out_path, dtype):
-    """Save numpy volume to raw file in little-endian order."""
-    # Ensure little-endian byte order if applicable
-    if volume.dtype.byteorder not in ('<', '|'):
-        volume = volume.byteswap().view(volume.dtype.newbyteorder('<'))
-    volume.astype(dtype).tofile(out_path)
+def save_raw_volume(volume, out_path, dtype, hasher=None):
+    """Save numpy volume to raw file in little-endian order.
 
-def main(tif_path):
-    # Load the TIFF stack
-    volume = tifffile.imread(tif_path)
+    If a hasher (see byte_manipulators/checksums.py) is given, the written bytes are fed to it.
+    """
+    # Cast to the little-endian variant of dtype; numpy swaps bytes only when needed
+    # (native '=' arrays on little-endian hosts are written as-is)
+    data = volume.astype(np.dtype(dtype).newbyteorder('<'), copy=False)
+    if hasher is not None:
+        data = np.ascontiguousarray(data)
+        hasher.update(data)
+    data.tofile(out_path)
+
+def main(tif_path, roi=None, stride=None, manifest=None):
+    # Load the TIFF stack, decoding only the requested region if any
+    if roi is None and stride is None:
+        volume = tifffile.imread(tif_path)
+    else:
+        volume = read_tif_region(tif_path, roi, stride)
     # Ensure it's at least 3D
     if volume.ndim == 2:
         volume = volume[np.newaxis, ...]
@@ -37,7 +59,8 @@ def main(tif_path):
         if volume.shape[-1] == 1:
             volume = volume[..., 0]
         else:
-            raise ValueError("4D TIFF stacks with multiple channels are not supported.")
+            raise ValueError("4D TIFF stacks with multiple channels are not supported "
+                             "(use --split-channels to write one raw file per channel).")
 
     # Get dimensions
     dim_z, dim_y, dim_x = volume.shape
@@ -53,12 +76,54 @@ def main(tif_path):
     out_path = os.path.join(os.path.dirname(tif_path), out_name)
 
     # Write raw file
-    save_raw_volume(volume, out_path, volume.dtype)
+    save_raw_volume(volume, out_path, volume.dtype, manifest.hasher(out_path) if manifest else None)
 
     print(f"Saved raw volume: {out_path}")
 
+def split_channels(tif_path, roi=None, stride=None, manifest=None):
+    """Write each channel of a multi-channel TIFF stack to its own raw file.
+
+    Every page is decoded once and its channels are scattered into the N outputs
+    as the stack is read, named '<base>_c<i>_XxYxZ_<dtype>.raw'.
+    """
+    base = os.path.splitext(os.path.basename(tif_path))[0]
+    with tifffile.TiffFile(tif_path) as tif, contextlib.ExitStack() as outputs:
+        stack = ChannelStack(tif, roi, stride)
+        dim_z, dim_y, dim_x = stack.shape
+        dtype_str = get_datatype_str(stack.dtype)
+        out_paths = [
+            os.path.join(os.path.dirname(tif_path), f"{base}_c{c}_{dim_x}x{dim_y}x{dim_z}_{dtype_str}.raw")
+            for c in range(stack.channels)
+        ]
+        files = [outputs.enter_context(open(p, 'wb')) for p in out_paths]
+        hashers = [manifest.hasher(p) if manifest else None for p in out_paths]
+        for planes in stack:
+            for fh, hasher, plane in zip(files, hashers, planes):
+                save_raw_volume(plane, fh, stack.dtype, hasher)
+
+    for out_path in out_paths:
+        print(f"Saved raw volume: {out_path}")
+    return out_paths
+
+def _cli(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a TIFF stack to a raw volume")
+    parser.add_argument("input", help="Input TIFF stack")
+    parser.add_argument("--roi", type=parse_roi, default=None, metavar="z0:z1,y0:y1,x0:x1",
+                        help="Only read this sub-box (empty bounds mean full range)")
+    parser.add_argument("--stride", type=parse_stride, default=None, metavar="N|Z,Y,X",
+                        help="Subsample by this step along each axis")
+    parser.add_argument("--split-channels", action="store_true",
+                        help="Write one raw file per channel instead of a single volume")
+    parser.add_argument("--manifest", metavar="PATH",
+                        help="Record chunked checksums of the written files in this JSON manifest")
+    args = parser.parse_args(argv)
+    manifest = Manifest(args.manifest) if args.manifest else None
+    if args.split_channels:
+        split_channels(args.input, roi=args.roi, stride=args.stride, manifest=manifest)
+    else:
+        main(args.input, roi=args.roi, stride=args.stride, manifest=manifest)
+    if manifest:
+        manifest.save()
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python tif_to_raw.py <input_stack.tif>")
-        sys.exit(1)
-    main(sys.argv[1])
+    _cli()
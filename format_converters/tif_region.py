@@ -0,0 +1,234 @@
+"""
+Read a region of interest from a TIFF stack without decoding the whole file.
+
+Pages outside the requested z-range are never touched. Uncompressed contiguous
+stacks are memory-mapped and sliced directly; for tiled or striped pages only the
+tiles/strips that intersect the region are read and decoded.
+"""
+
+import numpy as np
+import tifffile
+
+
+def resolve_region(shape, roi=None, stride=None):
+    """Combine roi and stride into three resolved slices for a (z, y, x) shape."""
+    roi = roi or (slice(None),) * 3
+    stride = stride or (1, 1, 1)
+    region = []
+    for s, step, n in zip(roi, stride, shape):
+        start, stop, _ = slice(s.start, s.stop).indices(n)
+        region.append(slice(start, max(start, stop), step))
+    return tuple(region)
+
+
+def region_shape(region):
+    """Number of samples selected by each resolved slice."""
+    return tuple(len(range(s.start, s.stop, s.step)) for s in region)
+
+
+def _segment_span(seg_start, seg_stop, sel):
+    """Intersect a segment [seg_start, seg_stop) with a strided selection.
+
+    Returns (first, stop, out_start) where first:stop are the image indices to take
+    from the segment and out_start the matching index in the output, or None.
+    """
+    start = max(seg_start, sel.start)
+    stop = min(seg_stop, sel.stop)
+    if start >= stop:
+        return None
+    # Round up to the next index on the stride grid
+    offset = (start - sel.start + sel.step - 1) // sel.step
+    first = sel.start + offset * sel.step
+    if first >= stop:
+        return None
+    return first, stop, offset
+
+
+def read_page_region(page, rows, cols):
+    """Decode only the tiles/strips of a TIFF page that intersect rows x cols.
+
+    Args:
+        page: tifffile.TiffPage or TiffFrame
+        rows, cols: resolved slice objects (with start, stop and step set)
+
+    Returns:
+        numpy array shaped like page.asarray()[..., rows, cols, ...]
+    """
+    key = page.keyframe
+    separate, depth, length, width, contig = key.shaped
+    if depth != 1 or len(page.dataoffsets) <= 1:
+        # Single segment (or volumetric tile): nothing to skip
+        return _crop_page(page.asarray(), key, rows, cols)
+
+    out_h = len(range(rows.start, rows.stop, rows.step))
+    out_w = len(range(cols.start, cols.stop, cols.step))
+    out = np.zeros((separate, out_h, out_w, contig), dtype=key.dtype)
+
+    if key.is_tiled:
+        seg_h, seg_w = key.tilelength, key.tilewidth
+    else:
+        seg_h, seg_w = key.rowsperstrip, width
+    segs_down = (length + seg_h - 1) // seg_h
+    segs_across = (width + seg_w - 1) // seg_w
+
+    # Collect the segments intersecting the region
+    wanted = {}
+    for s in range(separate):
+        for ty in range(segs_down):
+            y_span = _segment_span(ty * seg_h, min((ty + 1) * seg_h, length), rows)
+            if y_span is None:
+                continue
+            for tx in range(segs_across):
+                x_span = _segment_span(tx * seg_w, min((tx + 1) * seg_w, width), cols)
+                if x_span is None:
+                    continue
+                index = (s * segs_down + ty) * segs_across + tx
+                wanted[index] = (s, ty * seg_h, tx * seg_w, y_span, x_span)
+
+    decodeargs = {'_fullsize': key.is_tiled}
+    if key.compression in (6, 7, 34892, 33007):  # JPEG
+        decodeargs['jpegtables'] = key.jpegtables
+        decodeargs['jpegheader'] = key.jpegheader
+
+    indices = sorted(wanted)
+    fh = page.parent.filehandle
+    segments = fh.read_segments(
+        [page.dataoffsets[i] for i in indices],
+        [page.databytecounts[i] for i in indices],
+        indices=indices,
+        lock=fh.lock,
+    )
+    for data, index in segments:
+        s, seg_y, seg_x, (y_first, y_stop, oy), (x_first, x_stop, ox) = wanted[index]
+        segment, _, _ = key.decode(data, index, **decodeargs)
+        ny = len(range(y_first, y_stop, rows.step))
+        nx = len(range(x_first, x_stop, cols.step))
+        if segment is None:
+            continue  # empty segment, stays zero
+        out[s, oy:oy + ny, ox:ox + nx, :] = segment[
+            0,
+            y_first - seg_y:y_stop - seg_y:rows.step,
+            x_first - seg_x:x_stop - seg_x:cols.step,
+            :,
+        ]
+
+    # Match the axis layout of page.asarray()
+    if contig == 1:
+        out = out[..., 0]
+    if separate == 1:
+        out = out[0]
+    return out
+
+
+def _crop_page(image, page, rows, cols):
+    """Crop a fully decoded page, honoring separate-sample (planar) layout."""
+    if page.shaped[0] > 1:
+        return image[..., rows, cols]
+    return image[rows, cols, ...]
+
+
+def read_tif_region(tif_path, roi=None, stride=None):
+    """Read the (z, y, x) region of a TIFF stack selected by roi and stride.
+
+    Args:
+        tif_path: Path to the TIFF file
+        roi: Three slices (z, y, x) as returned by parse_roi, or None for everything
+        stride: (z, y, x) subsampling step, or None for (1, 1, 1)
+
+    Returns:
+        numpy array with shape (depth, height, width) or (depth, height, width, channels)
+    """
+    with tifffile.TiffFile(tif_path) as tif:
+        series = tif.series[0]
+        pages = series.pages
+        first = pages[0]
+        planar = first.shaped[0] > 1
+        height, width = first.shaped[2], first.shaped[3]
+        depth = len(pages)
+        zs, rows, cols = resolve_region((depth, height, width), roi, stride)
+
+        # Uncompressed contiguous stacks: map the file and slice without decoding
+        if not planar:
+            try:
+                mapped = tifffile.memmap(tif_path, mode='r')
+            except ValueError:
+                mapped = None
+            if mapped is not None and mapped.shape[:3] == (depth, height, width):
+                return np.array(mapped[zs, rows, cols])
+            if mapped is not None and mapped.shape[:2] == (height, width) and depth == 1:
+                return np.array(mapped[rows, cols])[np.newaxis, ...]
+
+        slices = [read_page_region(pages[z], rows, cols) for z in range(zs.start, zs.stop, zs.step)]
+    if not slices:
+        raise ValueError(f"ROI selects no slices from {tif_path}")
+    volume = np.stack(slices)
+    if planar:
+        # (z, samples, y, x) -> (z, y, x, samples)
+        volume = np.moveaxis(volume, 1, -1)
+    return volume
+
+
+class ChannelStack:
+    """
+    Page-by-page view of a multi-channel TIFF stack as (z, channel) planes.
+
+    Channels may be samples inside each page (RGB-like, contiguous or planar) or
+    separate pages along a 'C' axis (ImageJ/OME hyperstacks); any other leading
+    axes (Z, T, Q, ...) are flattened into z. Every page is decoded once and split
+    into its channels, so a stack can be scattered into per-channel outputs in a
+    single pass.
+    """
+
+    def __init__(self, tif, roi=None, stride=None):
+        series = tif.series[0]
+        key = series.keyframe
+        self.pages = series.pages
+        self.dtype = series.dtype
+        self.separate, _, height, width, self.contig = key.shaped
+        if self.separate > 1 and self.contig > 1:
+            raise ValueError("Pages with both planar and interleaved samples are not supported")
+        self.samples = self.separate * self.contig
+
+        lead_axes = series.axes[:len(series.axes) - len(key.axes)]
+        lead_shape = series.shape[:len(lead_axes)]
+        self.lead_shape = lead_shape
+        self.page_channels = lead_shape[lead_axes.index('C')] if 'C' in lead_axes else 1
+        self.channel_axis = lead_axes.index('C') if 'C' in lead_axes else None
+        z_shape = tuple(n for i, n in enumerate(lead_shape) if i != self.channel_axis)
+        depth = int(np.prod(z_shape)) if z_shape else 1
+        self.z_shape = z_shape
+        self.channels = self.page_channels * self.samples
+
+        self.region = resolve_region((depth, height, width), roi, stride)
+        self.shape = region_shape(self.region)
+        self.cropped = roi is not None or stride is not None
+
+    def _page_index(self, z, c):
+        coords = list(np.unravel_index(z, self.z_shape)) if self.z_shape else []
+        if self.channel_axis is not None:
+            coords.insert(self.channel_axis, c)
+        if not coords:
+            return 0
+        return int(np.ravel_multi_index(coords, self.lead_shape))
+
+    def _decode(self, index):
+        _, rows, cols = self.region
+        page = self.pages[index]
+        if self.cropped:
+            return read_page_region(page, rows, cols)
+        return page.asarray()
+
+    def __iter__(self):
+        """Yield one list of 2D planes (one per channel) for every z in the region."""
+        zs = self.region[0]
+        for z in range(zs.start, zs.stop, zs.step):
+            planes = []
+            for c in range(self.page_channels):
+                image = self._decode(self._page_index(z, c))
+                if self.separate > 1:
+                    planes.extend(image[s] for s in range(self.samples))
+                elif self.contig > 1:
+                    planes.extend(image[..., s] for s in range(self.samples))
+                else:
+                    planes.append(image)
+            yield planes
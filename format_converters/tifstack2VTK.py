@@ -7,25 +7,90 @@ and converts it to VTK (Visualization Toolkit) format.
 """
 
 import argparse
+import os
+import queue
+import re
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import numpy as np
-from PIL import Image
-import imageio
+import tifffile
+try:
+    from .tif_region import region_shape, resolve_region, read_page_region, read_tif_region
+    from .tifstack2raw import get_datatype_str
+except ImportError:
+    from tif_region import region_shape, resolve_region, read_page_region, read_tif_region
+    from tifstack2raw import get_datatype_str
+try:
+    from byte_manipulators.checksums import Manifest
+    from byte_manipulators.raw_format import parse_roi, parse_stride
+except ImportError:
+    import _repo_root  # noqa: F401 (run as a script)
+    from byte_manipulators.checksums import Manifest
+    from byte_manipulators.raw_format import parse_roi, parse_stride
 
 
-def read_tif_stack(tif_path):
+# Big-endian on-disk type for each VTK scalar type (VTK legacy files are big-endian)
+VTK_BIG_ENDIAN = {
+    "unsigned_char": '>u1',
+    "unsigned_short": '>u2',
+    "float": '>f4',
+    "char": '>i1',
+    "short": '>i2',
+    "unsigned_int": '>u4',
+    "int": '>i4',
+    "double": '>f8',
+}
+
+# VTK XML type name for each VTK scalar type
+VTK_XML_TYPE = {
+    "unsigned_char": "UInt8",
+    "unsigned_short": "UInt16",
+    "float": "Float32",
+    "char": "Int8",
+    "short": "Int16",
+    "unsigned_int": "UInt32",
+    "int": "Int32",
+    "double": "Float64",
+}
+
+# Slices buffered between pipeline stages (double buffering)
+PIPELINE_DEPTH = 2
+
+# Voxels per slab when normalizing to uint8 (bounds the float32 scratch buffer)
+NORMALIZE_SLAB_VOXELS = 1 << 22
+
+# Bins of the streaming histogram for wide-range data
+HISTOGRAM_BINS = 1 << 16
+
+# Passes at most when narrowing the histogram down to the percentile bins
+HISTOGRAM_PASSES = 4
+
+
+def read_tif_stack(tif_path, roi=None, stride=None):
     """
     Read a TIF file containing a stack of images.
     
     Args:
         tif_path: Path to the TIF file
+        roi: Optional (z, y, x) slices from raw_format.parse_roi; only the pages and
+             tiles/strips inside this box are decoded
+        stride: Optional (z, y, x) subsampling step
         
     Returns:
         numpy array with shape (depth, height, width) or (depth, height, width, channels)
     """
+    if roi is not None or stride is not None:
+        volume = read_tif_region(tif_path, roi, stride)
+        print(f"Loaded TIF region with shape: {volume.shape}")
+        print(f"Data type: {volume.dtype}")
+        print(f"Min value: {volume.min()}, Max value: {volume.max()}")
+        return volume
+
     try:
         # Try using imageio first (handles multi-page TIFF files well)
+        import imageio
         volume = imageio.volread(tif_path)
         print(f"Loaded TIF stack with shape: {volume.shape}")
         print(f"Data type: {volume.dtype}")
@@ -37,6 +102,7 @@ def read_tif_stack(tif_path):
         
         # Fallback to PIL
         try:
+            from PIL import Image
             img = Image.open(tif_path)
             frames = []
             
@@ -85,15 +151,242 @@ def deskew_volume(volume, offset_x_per_z):
     return deskewed
 
 
-def write_vtk(volume, output_path, spacing=(1.0, 1.0, 1.0), binary=True):
+def _slabs(volume):
+    """Yield (start, stop) z-ranges of about NORMALIZE_SLAB_VOXELS voxels each."""
+    depth = volume.shape[0]
+    step = max(1, NORMALIZE_SLAB_VOXELS // max(1, volume[0].size))
+    for z0 in range(0, depth, step):
+        yield z0, min(z0 + step, depth)
+
+
+def _window_histograms(volume, windows, integer):
+    """
+    Histogram the values inside each (lo, hi) window in one pass over the volume.
+    
+    Integer windows spanning fewer than HISTOGRAM_BINS values get one bin per value,
+    anything wider HISTOGRAM_BINS equal bins.
+    
+    Returns:
+        One (count of values below lo, bin counts, bin edges, exact) tuple per window
+    """
+    results = []
+    for lo, hi in windows:
+        exact = integer and hi - lo < HISTOGRAM_BINS
+        if exact:
+            edges = np.arange(hi - lo + 2, dtype=np.float64) + lo
+        else:
+            edges = np.linspace(lo, hi, HISTOGRAM_BINS + 1)
+        results.append([0, np.zeros(edges.size - 1, dtype=np.int64), edges, exact])
+    for z0, z1 in _slabs(volume):
+        slab = volume[z0:z1]
+        for result, (lo, hi) in zip(results, windows):
+            result[0] += np.count_nonzero(slab < lo)
+            if result[3]:
+                inside = slab[(slab >= lo) & (slab <= hi)]
+                result[1] += np.bincount((inside.astype(np.int64) - int(lo)).ravel(),
+                                         minlength=result[1].size)
+            else:
+                # Bin edges use the data's float type, too coarse for float16
+                values = slab.astype(np.float32) if slab.dtype == np.float16 else slab
+                result[1] += np.histogram(values, bins=HISTOGRAM_BINS, range=(lo, hi))[0]
+    return [tuple(result) for result in results]
+
+
+def percentile_range(volume, low=0.0, high=100.0):
+    """
+    Find the values at the low/high percentiles of a volume with a streaming histogram.
+    
+    The volume is scanned slab by slab, so no full-size temporary is created.
+    Integer data spanning fewer than HISTOGRAM_BINS values is counted exactly.
+    Wider data is binned into HISTOGRAM_BINS bins between min and max, then the
+    bin holding each percentile is binned again (a few passes at most), so a single
+    outlier does not cost resolution. Float results are interpolated within the
+    final bin.
+    
+    Returns:
+        (low_value, high_value) as floats
+    """
+    data_min = min(volume[z0:z1].min() for z0, z1 in _slabs(volume))
+    data_max = max(volume[z0:z1].max() for z0, z1 in _slabs(volume))
+    integer = np.issubdtype(volume.dtype, np.integer)
+    return _refine_percentiles(lambda windows: _window_histograms(volume, windows, integer),
+                               data_min, data_max, volume.size, volume.dtype, low, high)
+
+
+def _refine_percentiles(histograms, data_min, data_max, total, dtype, low, high, window=None):
+    """
+    Narrow histograms down to the values at the low/high percentiles (see percentile_range).
+    
+    Args:
+        histograms: Called with a list of (lo, hi) windows, returns _window_histograms
+                    results covering all the data
+        data_min, data_max: Extremes of the data
+        total: Number of values
+        dtype: Data type of the values
+        window: (lo, hi) of the first histogram pass (default: data_min, data_max)
+    """
+    if low <= 0.0 and high >= 100.0:
+        return float(data_min), float(data_max)
+    
+    integer = np.issubdtype(dtype, np.integer)
+    edge_type = np.result_type(dtype, np.float32).type
+    targets = [(total * low / 100.0, 'right'), (total * high / 100.0, 'left')]
+    windows = [window or (float(data_min), float(data_max))] * 2
+    values = [None, None]
+    done = [False, False]
+    for _ in range(HISTOGRAM_PASSES):
+        pending = [i for i in range(2) if not done[i]]
+        if not pending:
+            break
+        # Both percentiles start out in the same window; histogram it once
+        unique = list(dict.fromkeys(windows[i] for i in pending))
+        results = dict(zip(unique, histograms(unique)))
+        for i in pending:
+            below, counts, edges, exact = results[windows[i]]
+            rank, side = targets[i]
+            cumulative = below + np.cumsum(counts)
+            b = min(int(np.searchsorted(cumulative, rank, side=side)), counts.size - 1)
+            e0, e1 = float(edges[b]), float(edges[b + 1])
+            if exact:
+                values[i] = e0
+                done[i] = True
+                continue
+            # Interpolate within the bin, and narrow the next pass down to it
+            before = cumulative[b] - counts[b]
+            fraction = (rank - before) / counts[b] if counts[b] else 0.0
+            values[i] = e0 + (e1 - e0) * min(max(fraction, 0.0), 1.0)
+            if integer:
+                windows[i] = (float(np.ceil(e0)), float(np.floor(e1)))
+                done[i] = windows[i][0] > windows[i][1]
+            else:
+                windows[i] = (e0, e1)
+                # Stop once the bin holds a single value or is too narrow to split again
+                done[i] = counts[b] <= 1 or e1 - e0 <= np.spacing(edge_type(max(abs(e0), abs(e1)))) * HISTOGRAM_BINS
+    return float(values[0]), float(values[1])
+
+
+def normalize_to_uint8(volume, low=0.0, high=100.0, value_range=None):
+    """
+    Map a volume to 0-255 between its low/high percentiles, clipping outliers.
+    
+    Subtract, scale, clip and cast are applied slab by slab through one reused
+    float32 buffer straight into the uint8 output, instead of building a float64
+    copy of the whole volume. lo is subtracted before converting to float32
+    (exactly, in 64-bit integers for integer data), so values with a large offset
+    keep their resolution. A given value_range (lo, hi) replaces the percentiles,
+    e.g. to share one range across the timepoints of a series.
+    
+    Returns:
+        uint8 numpy array with the shape of volume
+    """
+    if value_range is None:
+        lo, hi = percentile_range(volume, low, high)
+        source = f"percentiles {low} .. {high}"
+    else:
+        lo, hi = value_range
+        source = "given range"
+    out = np.zeros(volume.shape, dtype=np.uint8)
+    if hi <= lo:
+        return out
+    print(f"Normalizing {lo} .. {hi} ({source}) to 0 .. 255")
+    # Scale as (v - lo) * 255 / (hi - lo): the division is correctly rounded, so
+    # values that map exactly onto an integer (e.g. the maximum) are not truncated down
+    span = np.float32(hi - lo)
+    integer = np.issubdtype(volume.dtype, np.integer)
+    if integer:
+        # Clipped to lo_int..hi_int the difference is non-negative; signed values
+        # subtract in int64 and wrap into the same bits as the uint64 difference
+        lo_int, hi_int = int(np.floor(lo)), int(np.ceil(hi))
+        wide_type = np.uint64 if volume.dtype.kind == 'u' else np.int64
+        fraction = np.float32(lo - lo_int)
+    else:
+        wide_type = np.result_type(volume.dtype, np.float32)
+    buffer = scratch = None
+    for z0, z1 in _slabs(volume):
+        slab = volume[z0:z1]
+        if buffer is None or buffer.shape != slab.shape:
+            buffer = np.empty(slab.shape, dtype=np.float32)
+            scratch = np.empty(slab.shape, dtype=wide_type)
+        if integer:
+            np.clip(slab, lo_int, hi_int, out=scratch)
+            np.subtract(scratch, lo_int, out=scratch)
+            buffer[...] = scratch.view(np.uint64)
+            np.subtract(buffer, fraction, out=buffer)
+        else:
+            np.subtract(slab, lo, out=scratch, dtype=wide_type)
+            buffer[...] = scratch
+        np.multiply(buffer, np.float32(255.0), out=buffer)
+        np.divide(buffer, span, out=buffer)
+        np.clip(buffer, 0.0, 255.0, out=buffer)
+        out[z0:z1] = buffer
+    return out
+
+
+def vtk_binary_header(width, height, depth, spacing, scalar_type):
+    """Return the ASCII header of a binary legacy VTK structured points file."""
+    header = "# vtk DataFile Version 3.0\n"
+    header += "TIF to VTK conversion\n"
+    header += "BINARY\n"
+    header += "DATASET STRUCTURED_POINTS\n"
+    header += f"DIMENSIONS {width} {height} {depth}\n"
+    header += f"SPACING {spacing[0]:.6f} {spacing[1]:.6f} {spacing[2]:.6f}\n"
+    header += "ORIGIN 0.0 0.0 0.0\n"
+    
+    num_points = width * height * depth
+    header += f"POINT_DATA {num_points}\n"
+    header += f"SCALARS image_data {scalar_type} 1\n"
+    header += "LOOKUP_TABLE default\n"
+    return header.encode('ascii')
+
+
+def vti_header(width, height, depth, spacing, scalar_type):
+    """
+    Return the header of a VTK XML ImageData (.vti) file with raw appended data.
+    
+    The data is declared big-endian so the same bytes as in legacy files follow;
+    the caller writes the data and then VTI_FOOTER.
+    """
+    extent = f"0 {width - 1} 0 {height - 1} 0 {depth - 1}"
+    num_bytes = width * height * depth * np.dtype(VTK_BIG_ENDIAN[scalar_type]).itemsize
+    header = '<?xml version="1.0"?>\n'
+    header += '<VTKFile type="ImageData" version="1.0" byte_order="BigEndian" header_type="UInt64">\n'
+    header += f'  <ImageData WholeExtent="{extent}" Origin="0 0 0" '
+    header += f'Spacing="{spacing[0]:.6f} {spacing[1]:.6f} {spacing[2]:.6f}">\n'
+    header += f'    <Piece Extent="{extent}">\n'
+    header += '      <PointData Scalars="image_data">\n'
+    header += f'        <DataArray type="{VTK_XML_TYPE[scalar_type]}" Name="image_data" format="appended" offset="0"/>\n'
+    header += '      </PointData>\n'
+    header += '    </Piece>\n'
+    header += '  </ImageData>\n'
+    header += '  <AppendedData encoding="raw">\n_'
+    return header.encode('ascii') + np.array(num_bytes, dtype='>u8').tobytes()
+
+
+VTI_FOOTER = b'\n  </AppendedData>\n</VTKFile>\n'
+
+
+def vtk_file_framing(output_path, width, height, depth, spacing, scalar_type):
+    """Return (header, footer) bytes for a binary .vti (by suffix) or legacy .vtk file."""
+    if str(output_path).lower().endswith('.vti'):
+        return vti_header(width, height, depth, spacing, scalar_type), VTI_FOOTER
+    return vtk_binary_header(width, height, depth, spacing, scalar_type), b''
+
+
+def write_vtk(volume, output_path, spacing=(1.0, 1.0, 1.0), binary=True, percentiles=(0.0, 100.0), hasher=None,
+              value_range=None):
     """
     Write volume data to VTK format (legacy format, binary or ASCII).
     
     Args:
         volume: 3D numpy array with shape (depth, height, width)
-        output_path: Path to output VTK file
+        output_path: Path to output VTK file (a .vti suffix writes VTK XML ImageData,
+                     which is always binary)
         spacing: Tuple of (x, y, z) spacing between voxels
         binary: If True, write binary format (faster, smaller); if False, write ASCII
+        percentiles: (low, high) percentiles mapped to 0 and 255 when data other than
+                     uint8/uint16/float is normalized (default: global min/max)
+        hasher: Optional checksums.ChunkHasher fed with the bytes as they are written
+        value_range: Optional (lo, hi) mapped to 0 and 255 instead of the percentiles
     """
     # Handle multi-channel images by converting to grayscale if needed
     if len(volume.shape) == 4:
@@ -124,32 +417,20 @@ def write_vtk(volume, output_path, spacing=(1.0, 1.0, 1.0), binary=True):
         scalar_type = "float"
     else:
         # Normalize to 0-255 range for other types
-        data_min = float(volume.min())
-        data_max = float(volume.max())
-        if data_max > data_min:
-            data_array = ((volume.astype(np.float64) - data_min) / (data_max - data_min) * 255).astype(np.uint8)
-        else:
-            data_array = np.zeros_like(volume, dtype=np.uint8)
+        data_array = normalize_to_uint8(volume, *percentiles, value_range=value_range)
         scalar_type = "unsigned_char"
     
+    if str(output_path).lower().endswith('.vti'):
+        binary = True
+    
     if binary:
         # Write binary VTK file
+        header, footer = vtk_file_framing(output_path, width, height, depth, spacing, scalar_type)
         with open(output_path, 'wb') as f:
+            if hasher is not None:
+                f = hasher.wrap(f)
             # Write ASCII header
-            header = "# vtk DataFile Version 3.0\n"
-            header += "TIF to VTK conversion\n"
-            header += "BINARY\n"
-            header += "DATASET STRUCTURED_POINTS\n"
-            header += f"DIMENSIONS {width} {height} {depth}\n"
-            header += f"SPACING {spacing[0]:.6f} {spacing[1]:.6f} {spacing[2]:.6f}\n"
-            header += "ORIGIN 0.0 0.0 0.0\n"
-            
-            num_points = width * height * depth
-            header += f"POINT_DATA {num_points}\n"
-            header += f"SCALARS image_data {scalar_type} 1\n"
-            header += "LOOKUP_TABLE default\n"
-            
-            f.write(header.encode('ascii'))
+            f.write(header)
             
             # VTK expects data in (z, y, x) order with x varying fastest
             # Our data is (depth, height, width) which is (z, y, x)
@@ -159,15 +440,13 @@ def write_vtk(volume, output_path, spacing=(1.0, 1.0, 1.0), binary=True):
             data_flat = data_reordered.flatten(order='C')  # Flatten with x varying fastest
             
             # Write data in big-endian format (VTK standard)
-            if scalar_type == "unsigned_char":
-                f.write(data_flat.astype('>u1').tobytes())
-            elif scalar_type == "unsigned_short":
-                f.write(data_flat.astype('>u2').tobytes())
-            elif scalar_type == "float":
-                f.write(data_flat.astype('>f4').tobytes())
+            f.write(data_flat.astype(VTK_BIG_ENDIAN[scalar_type]).tobytes())
+            f.write(footer)
     else:
         # Write ASCII VTK file
-        with open(output_path, 'w') as f:
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            if hasher is not None:
+                f = hasher.wrap(f)
             # Header
             f.write("# vtk DataFile Version 3.0\n")
             f.write("TIF to VTK conversion\n")
@@ -208,7 +487,154 @@ def write_vtk(volume, output_path, spacing=(1.0, 1.0, 1.0), binary=True):
     print(f"Spacing: {spacing}")
 
 
-def process_single_file(input_path, output_path, spacing, binary, deskew_offset):
+def _put(q, item, stop):
+    """Put item on a bounded queue, giving up if the pipeline was stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _run_stage(produce, outbox, stop):
+    """Thread body: push every item of produce() to outbox, then None (or the error)."""
+    try:
+        for item in produce():
+            if not _put(outbox, item, stop):
+                return
+        _put(outbox, None, stop)
+    except BaseException as e:
+        _put(outbox, e, stop)
+
+
+def _drain(inbox, stop):
+    """Yield items from an upstream stage until its end marker, re-raising its errors.
+
+    Stops early once the pipeline was stopped (e.g. the writer failed), since the
+    upstream stage then gives up without sending its end marker.
+    """
+    while True:
+        try:
+            item = inbox.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is None:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def process_single_file_pipelined(input_path, output_path, spacing, deskew_offset, roi=None, stride=None,
+                                  hasher=None):
+    """
+    Convert a TIF file to binary VTK with overlapped read, convert and write stages.
+    
+    Pages are decoded by a reader thread, converted (grayscale, deskew, big-endian
+    cast) by a worker thread and written by the calling thread. Stages are linked
+    by bounded queues of PIPELINE_DEPTH slices, so only a few slices are in memory
+    and wall time approaches that of the slowest stage. The output is byte for
+    byte what process_single_file writes.
+    
+    Returns:
+        False if the stack needs whole-volume processing (e.g. min/max
+        normalization of non uint8/uint16/float data) and was not converted.
+    """
+    with tifffile.TiffFile(input_path) as tif:
+        series = tif.series[0]
+        pages = series.pages
+        separate, _, height, width, contig = pages[0].keyframe.shaped
+        depth = len(pages)
+        if separate != 1 or series.shape[:3] != (depth, height, width):
+            return False
+        if contig > 1 and deskew_offset is not None:
+            return False
+
+        zs, rows, cols = resolve_region((depth, height, width), roi, stride)
+        z_indices = range(zs.start, zs.stop, zs.step)
+        cropped = roi is not None or stride is not None
+        depth = len(z_indices)
+        height = len(range(rows.start, rows.stop, rows.step))
+        width = len(range(cols.start, cols.stop, cols.step))
+
+        # Same conversions as write_vtk, decided per slice dtype up front
+        if contig in (3, 4):
+            out_dtype = np.dtype(np.float64)
+        else:
+            out_dtype = series.dtype
+        if out_dtype == np.uint8:
+            scalar_type = "unsigned_char"
+        elif out_dtype == np.uint16:
+            scalar_type = "unsigned_short"
+        elif out_dtype == np.float32 or out_dtype == np.float64:
+            scalar_type = "float"
+        else:
+            return False
+        disk_dtype = VTK_BIG_ENDIAN[scalar_type]
+
+        nx = width
+        if deskew_offset is not None:
+            nx = int(width + (deskew_offset * (depth - 1)))
+            print(f"Deskewing from {width}x{height}x{depth} to {nx}x{height}x{depth}")
+
+        def read_pages():
+            for z in z_indices:
+                if cropped:
+                    yield read_page_region(pages[z], rows, cols)
+                else:
+                    yield pages[z].asarray()
+
+        def convert_slices():
+            for i, image in enumerate(_drain(decoded, stop)):
+                if contig in (3, 4):
+                    image = np.dot(image[..., :3], [0.299, 0.587, 0.114])
+                elif contig > 1:
+                    image = image[..., 0]
+                if deskew_offset is not None:
+                    base = int(i * deskew_offset)
+                    shifted = np.zeros((height, nx), dtype=image.dtype)
+                    shifted[:, base:base + width] = image
+                    image = shifted
+                yield np.ascontiguousarray(image, dtype=disk_dtype)
+
+        stop = threading.Event()
+        decoded = queue.Queue(maxsize=PIPELINE_DEPTH)
+        converted = queue.Queue(maxsize=PIPELINE_DEPTH)
+        workers = [
+            threading.Thread(target=_run_stage, args=(read_pages, decoded, stop), daemon=True),
+            threading.Thread(target=_run_stage, args=(convert_slices, converted, stop), daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+        header, footer = vtk_file_framing(output_path, nx, height, depth, spacing, scalar_type)
+        try:
+            with open(output_path, 'wb') as f:
+                if hasher is not None:
+                    f = hasher.wrap(f)
+                f.write(header)
+                for data in _drain(converted, stop):
+                    f.write(memoryview(data).cast('B'))
+                f.write(footer)
+        finally:
+            # On a write error the threads wind down first, then the error propagates
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    print(f"VTK file written to: {output_path}")
+    print(f"Format: Binary (pipelined)")
+    print(f"Data type: {scalar_type}")
+    print(f"Dimensions: {nx} x {height} x {depth}")
+    print(f"Spacing: {spacing}")
+    return True
+
+
+def process_single_file(input_path, output_path, spacing, binary, deskew_offset, roi=None, stride=None,
+                        pipelined=False, percentiles=(0.0, 100.0), hasher=None, value_range=None):
     """
     Process a single TIF file and convert it to VTK.
     
@@ -218,13 +644,27 @@ def process_single_file(input_path, output_path, spacing, binary, deskew_offset)
         spacing: Tuple of (x, y, z) voxel spacing
         binary: Whether to write binary format
         deskew_offset: Deskew offset value (None if no deskewing)
+        roi: Optional (z, y, x) region of interest to read
+        stride: Optional (z, y, x) subsampling step
+        pipelined: Overlap reading, conversion and writing (binary output only)
+        percentiles: (low, high) percentiles used to normalize non uint8/uint16/float data
+        hasher: Optional checksums.ChunkHasher fed with the output bytes as they are written
+        value_range: Optional (lo, hi) used instead of the percentiles (see normalize_to_uint8)
     """
     print(f"Input file: {input_path}")
     print(f"Output file: {output_path}")
     
+    if pipelined and binary:
+        print("\nConverting with pipelined read/convert/write...")
+        if process_single_file_pipelined(input_path, output_path, spacing, deskew_offset,
+                                         roi=roi, stride=stride, hasher=hasher):
+            print("\nConversion complete!")
+            return
+        print("Stack needs whole-volume processing, falling back to sequential conversion.")
+    
     # Read TIF stack
     print("\nReading TIF stack...")
-    volume = read_tif_stack(input_path)
+    volume = read_tif_stack(input_path, roi=roi, stride=stride)
     
     # Apply deskewing if requested
     if deskew_offset is not None:
@@ -233,12 +673,256 @@ def process_single_file(input_path, output_path, spacing, binary, deskew_offset)
     
     # Write VTK file
     print("\nWriting VTK file...")
-    write_vtk(volume, output_path, spacing=spacing, binary=binary)
+    write_vtk(volume, output_path, spacing=spacing, binary=binary, percentiles=percentiles, hasher=hasher,
+              value_range=value_range)
     
     print("\nConversion complete!")
 
 
-def main():
+def probe_stack(tif_path):
+    """Return (shape, dtype) of the first series of a TIF file without decoding pixels."""
+    with tifffile.TiffFile(tif_path) as tif:
+        series = tif.series[0]
+        return tuple(series.shape), series.dtype
+
+
+def _read_timepoint(input_path, deskew_offset, roi, stride):
+    """Decode one timepoint the way process_single_file does before normalizing it."""
+    volume = read_tif_stack(input_path, roi=roi, stride=stride)
+    if deskew_offset is not None:
+        volume = deskew_volume(volume, deskew_offset)
+    return volume
+
+
+def _timepoint_histograms(job):
+    """Worker: (min, max, voxel count, _window_histograms or None without windows) of one timepoint."""
+    input_path, deskew_offset, roi, stride, windows, integer = job
+    volume = _read_timepoint(input_path, deskew_offset, roi, stride)
+    histograms = _window_histograms(volume, windows, integer) if windows else None
+    return volume.min(), volume.max(), volume.size, histograms
+
+
+def series_percentile_range(executor, tif_files, dtype, low=0.0, high=100.0, deskew_offset=None, roi=None, stride=None):
+    """
+    Find the low/high percentiles over all timepoints of a series, like percentile_range.
+    
+    Timepoints are decoded in the executor's worker processes and only their
+    extremes and histograms are sent back, so the series is never held in memory
+    as a whole. The first pass returns min/max together with a histogram over the
+    whole range of up to 32-bit integer dtypes, so 0/100 percentiles and 8/16-bit
+    data take a single pass and 32-bit data two. Other data starts histogramming
+    from the min/max found in the first pass (wide 64-bit ranges would need more
+    passes starting from the dtype range).
+    
+    Returns:
+        (low_value, high_value) as floats
+    """
+    jobs = [(tif_file, deskew_offset, roi, stride) for tif_file in tif_files]
+    integer = np.issubdtype(dtype, np.integer)
+    window = None
+    if integer and dtype.itemsize <= 4 and not (low <= 0.0 and high >= 100.0):
+        info = np.iinfo(dtype)
+        window = (float(info.min), float(info.max))
+    
+    def run_pass(windows):
+        merged = None
+        results = []
+        for result in executor.map(_timepoint_histograms, [job + (windows, integer) for job in jobs]):
+            results.append(result[:3])
+            if result[3] is None:
+                continue
+            if merged is None:
+                merged = [list(histogram) for histogram in result[3]]
+                continue
+            for histogram, (below, counts, _, _) in zip(merged, result[3]):
+                histogram[0] += below
+                histogram[1] += counts
+        return results, merged and [tuple(histogram) for histogram in merged]
+    
+    extremes, first = run_pass([window] if window else None)
+    
+    def histograms(windows):
+        # The first pass already histogrammed the starting windows
+        nonlocal first
+        if first is not None:
+            result, first = first, None
+            return result
+        return run_pass(windows)[1]
+    
+    return _refine_percentiles(histograms, min(e[0] for e in extremes), max(e[1] for e in extremes),
+                               sum(e[2] for e in extremes), dtype, low, high, window)
+
+
+def _convert_timepoint_vtk(job):
+    """Worker: convert one timepoint to its own VTK file (see convert_time_series)."""
+    input_path, output_path, spacing, deskew_offset, roi, stride, pipelined, value_range, hasher = job
+    process_single_file(input_path, output_path, spacing, True, deskew_offset, roi=roi, stride=stride,
+                        pipelined=pipelined, hasher=hasher, value_range=value_range)
+    return output_path, hasher.finish() if hasher is not None else None
+
+
+def _convert_timepoint_raw(job):
+    """Worker: decode one timepoint and write it into its frame of the shared 4D raw file.
+    
+    With a hasher (chunk size = one frame) the frame's checksum is returned as well.
+    """
+    input_path, raw_path, index, frame_shape, dtype, deskew_offset, roi, stride, hasher = job
+    volume = read_tif_region(input_path, roi, stride)
+    if deskew_offset is not None:
+        volume = deskew_volume(volume, deskew_offset)
+    frame_bytes = int(np.prod(frame_shape)) * dtype.itemsize
+    frame = np.memmap(raw_path, dtype=dtype.newbyteorder('<'), mode='r+',
+                      offset=index * frame_bytes, shape=frame_shape)
+    frame[:] = volume
+    if hasher is not None:
+        hasher.update(frame)
+    frame.flush()
+    del frame
+    return input_path, hasher.finish()['chunks'][0] if hasher is not None else None
+
+
+def write_pvd(pvd_path, files, time_values=None, hasher=None):
+    """Write a ParaView .pvd collection referencing one dataset file per timestep."""
+    pvd_dir = os.path.dirname(os.path.abspath(pvd_path))
+    lines = ['<?xml version="1.0"?>',
+             '<VTKFile type="Collection" version="0.1" byte_order="LittleEndian">',
+             '  <Collection>']
+    for i, path in enumerate(files):
+        timestep = time_values[i] if time_values is not None else i
+        relative = os.path.relpath(os.path.abspath(path), pvd_dir)
+        lines.append(f'    <DataSet timestep="{timestep}" group="" part="0" file="{relative}"/>')
+    lines += ['  </Collection>', '</VTKFile>', '']
+    with open(pvd_path, 'w', newline='', encoding='utf-8') as f:
+        if hasher is not None:
+            f = hasher.wrap(f)
+        f.write('\n'.join(lines))
+
+
+def write_nrrd_header(nhdr_path, raw_path, sizes, dtype, spacing, hasher=None):
+    """Write a detached NRRD header (.nhdr) describing a little-endian raw file.
+    
+    Args:
+        sizes: Axis sizes, fastest first (e.g. X, Y, Z, T)
+        spacing: (x, y, z) voxel spacing; the time axis gets no spacing
+    """
+    nrrd_types = {'u1': 'uint8', 'i1': 'int8', 'u2': 'uint16', 'i2': 'int16', 'u4': 'uint32',
+                  'i4': 'int32', 'u8': 'uint64', 'i8': 'int64', 'f4': 'float', 'f8': 'double'}
+    spacings = [f"{sp:.6f}" for sp in spacing] + ['nan'] * (len(sizes) - len(spacing))
+    kinds = ['domain'] * 3 + ['time'] * (len(sizes) - 3)
+    lines = ['NRRD0004',
+             f"type: {nrrd_types[dtype.kind + str(dtype.itemsize)]}",
+             f"dimension: {len(sizes)}",
+             f"sizes: {' '.join(str(n) for n in sizes)}",
+             f"spacings: {' '.join(spacings)}",
+             f"kinds: {' '.join(kinds)}",
+             'endian: little',
+             'encoding: raw',
+             f"data file: {os.path.relpath(os.path.abspath(raw_path), os.path.dirname(os.path.abspath(nhdr_path)))}",
+             '']
+    with open(nhdr_path, 'w', newline='', encoding='utf-8') as f:
+        if hasher is not None:
+            f = hasher.wrap(f)
+        f.write('\n'.join(lines))
+
+
+def natural_sort_key(path):
+    """Sort key ordering numbers in file names by value, e.g. t2 before t10."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', Path(path).name)]
+
+
+def convert_time_series(tif_files, output_dir, spacing, mode='pvd', deskew_offset=None, roi=None, stride=None,
+                        pipelined=False, percentiles=(0.0, 100.0), workers=None, name='series', manifest=None):
+    """
+    Convert TIF stacks that are timepoints of one acquisition into a linked series.
+    
+    All files must share shape and dtype; this is checked once from the TIF headers
+    before any pixel is decoded. Timepoints are then converted concurrently in
+    worker processes. Data normalized to uint8 uses one percentile range computed
+    over the whole series, so contrast is consistent between timepoints.
+    
+    Args:
+        tif_files: TIF files in time order
+        output_dir: Directory for the outputs
+        mode: 'pvd' writes one .vti per timepoint plus <name>.pvd for ParaView;
+              'raw' writes a single memory-mappable (T, Z, Y, X) little-endian
+              <name>_XxYxZxT_<dtype>.raw plus a detached NRRD header (.nhdr)
+        workers: Number of worker processes (default: all cores)
+        manifest: Optional checksums.Manifest; the workers hash what they write
+        
+    Returns:
+        Path to the .pvd or .nhdr file
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    shape, dtype = probe_stack(tif_files[0])
+    for tif_file in tif_files[1:]:
+        other_shape, other_dtype = probe_stack(tif_file)
+        if other_shape != shape or other_dtype != dtype:
+            raise ValueError(f"Timepoint {tif_file} is {other_shape} {other_dtype}, "
+                             f"expected {shape} {dtype} like {tif_files[0]}")
+    print(f"Time series of {len(tif_files)} timepoint(s), each {shape} {dtype}")
+    
+    if mode == 'pvd':
+        outputs = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Same condition as write_vtk: single-channel data other than uint8/uint16/float
+            value_range = None
+            if len(shape) == 3 and dtype not in (np.uint8, np.uint16, np.float32, np.float64):
+                value_range = series_percentile_range(executor, tif_files, dtype, *percentiles,
+                                                      deskew_offset=deskew_offset, roi=roi, stride=stride)
+                print(f"Series intensity range {value_range[0]} .. {value_range[1]} "
+                      f"(percentiles {percentiles[0]} .. {percentiles[1]})")
+            jobs = []
+            for tif_file in tif_files:
+                output_path = output_dir / Path(tif_file).with_suffix('.vti').name
+                hasher = manifest.hasher(output_path, register=False) if manifest else None
+                jobs.append((tif_file, output_path, spacing, deskew_offset, roi, stride, pipelined, value_range, hasher))
+            for output_path, entry in executor.map(_convert_timepoint_vtk, jobs):
+                outputs.append(output_path)
+                if manifest:
+                    manifest.add(output_path, entry)
+        pvd_path = output_dir / f"{name}.pvd"
+        write_pvd(pvd_path, outputs, hasher=manifest.hasher(pvd_path) if manifest else None)
+        print(f"\nParaView collection written to: {pvd_path}")
+        return pvd_path
+    
+    if mode != 'raw':
+        raise ValueError(f"Unknown time series mode '{mode}' (expected 'pvd' or 'raw')")
+    if len(shape) != 3:
+        raise ValueError(f"Raw time series need single-channel 3D stacks, got {shape}")
+    frame_shape = region_shape(resolve_region(shape, roi, stride))
+    if deskew_offset is not None:
+        z, y, x = frame_shape
+        frame_shape = (z, y, int(x + (deskew_offset * (z - 1))))
+    depth, height, width = frame_shape
+    count = len(tif_files)
+    
+    raw_path = output_dir / f"{name}_{width}x{height}x{depth}x{count}_{get_datatype_str(dtype.newbyteorder('='))}.raw"
+    frame_bytes = int(np.prod(frame_shape)) * dtype.itemsize
+    with open(raw_path, 'wb') as f:
+        f.truncate(count * frame_bytes)
+    # Frames are written in parallel, so each one is checksummed as a chunk of its own
+    frame_hasher = manifest.hasher(raw_path, register=False, chunk_size=frame_bytes) if manifest else None
+    jobs = [(tif_file, raw_path, t, frame_shape, dtype, deskew_offset, roi, stride, frame_hasher)
+            for t, tif_file in enumerate(tif_files)]
+    frame_digests = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for done, digest in executor.map(_convert_timepoint_raw, jobs):
+            print(f"Converted timepoint: {done}")
+            frame_digests.append(digest)
+    if manifest:
+        manifest.add(raw_path, {'size': count * frame_bytes, 'chunk_size': frame_bytes, 'chunks': frame_digests})
+    
+    nhdr_path = raw_path.with_suffix('.nhdr')
+    write_nrrd_header(nhdr_path, raw_path, (width, height, depth, count), dtype, spacing,
+                      hasher=manifest.hasher(nhdr_path) if manifest else None)
+    print(f"\n4D raw volume written to: {raw_path}")
+    print(f"NRRD header written to: {nhdr_path}")
+    return nhdr_path
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Convert TIF image stack to VTK format',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -249,7 +933,12 @@ Examples:
   python tif2VTK.py input.tif -s 1.0 1.0 2.0
   python tif2VTK.py input.tif --ascii
   python tif2VTK.py input.tif -dskw 7
+  python tif2VTK.py input.tif -p 0.1 99.9
+  python tif2VTK.py input.tif --roi 0:100,256:768,: --stride 2
   python tif2VTK.py /path/to/directory/
+  python tif2VTK.py /path/to/timepoints/ --time-series pvd -o series/
+  python tif2VTK.py /path/to/timepoints/ --time-series raw -j 8
+  python tif2VTK.py input.tif --manifest checksums.json
         """
     )
     
@@ -262,8 +951,35 @@ Examples:
                         help='Write ASCII format instead of binary (binary is default)')
     parser.add_argument('-dskw', '--deskew', type=float, metavar='OFFSET',
                         help='Deskew the volume with specified offset_x_per_z (e.g., 7)')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Overlap reading, deskewing and writing of slices (binary output only)')
+    parser.add_argument('-p', '--percentiles', type=float, nargs=2, default=[0.0, 100.0],
+                        metavar=('LOW', 'HIGH'),
+                        help='Percentiles mapped to 0 and 255 when normalizing integer data other than '
+                             'uint8/uint16 (default: 0 100, i.e. min/max)')
+    parser.add_argument('--time-series', choices=['pvd', 'raw'],
+                        help='Treat the TIF files of a directory as timepoints of one series: "pvd" writes '
+                             'per-timepoint .vti files and a ParaView .pvd collection, "raw" one 4D raw file '
+                             'with an NRRD header')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Worker processes for --time-series (default: all cores)')
+    parser.add_argument('--roi', type=parse_roi, metavar='z0:z1,y0:y1,x0:x1',
+                        help='Only read this sub-box of the stack (empty bounds mean full range)')
+    parser.add_argument('--stride', type=parse_stride, metavar='N|Z,Y,X',
+                        help='Subsample the stack by this step along each axis')
+    parser.add_argument('--manifest', metavar='PATH',
+                        help='Record chunked checksums of the written files in this JSON manifest '
+                             '(check them later with "volconv verify PATH")')
+    
+    args = parser.parse_args(argv)
+    low, high = args.percentiles
+    if not 0.0 <= low < high <= 100.0:
+        parser.error(f"--percentiles needs 0 <= LOW < HIGH <= 100, got {low:g} {high:g}")
+    manifest = Manifest(args.manifest) if args.manifest else None
     
-    args = parser.parse_args()
+    # Subsampled voxels are farther apart; stride is (z, y, x), spacing is (x, y, z)
+    if args.stride:
+        args.spacing = [sp * st for sp, st in zip(args.spacing, args.stride[::-1])]
     
     # Validate input path
     input_path = Path(args.input)
@@ -292,6 +1008,25 @@ Examples:
         else:
             output_dir = input_path
         
+        if args.time_series:
+            convert_time_series(
+                sorted(tif_files, key=natural_sort_key),
+                output_dir,
+                tuple(args.spacing),
+                mode=args.time_series,
+                deskew_offset=args.deskew,
+                roi=args.roi,
+                stride=args.stride,
+                pipelined=args.pipeline,
+                percentiles=tuple(args.percentiles),
+                workers=args.jobs,
+                name=input_path.resolve().name,
+                manifest=manifest
+            )
+            if manifest:
+                manifest.save()
+            return
+        
         # Process each file
         for i, tif_file in enumerate(tif_files, 1):
             print(f"\n{'='*80}")
@@ -306,10 +1041,17 @@ Examples:
                     output_file, 
                     tuple(args.spacing), 
                     not args.ascii, 
-                    args.deskew
+                    args.deskew,
+                    roi=args.roi,
+                    stride=args.stride,
+                    pipelined=args.pipeline,
+                    percentiles=tuple(args.percentiles),
+                    hasher=manifest.hasher(output_file) if manifest else None
                 )
             except Exception as e:
                 print(f"Error processing {tif_file.name}: {e}")
+                if manifest:
+                    manifest.discard(output_file)
                 continue
         
         print(f"\n{'='*80}")
@@ -333,8 +1075,16 @@ Examples:
             output_path, 
             tuple(args.spacing), 
             not args.ascii, 
-            args.deskew
+            args.deskew,
+            roi=args.roi,
+            stride=args.stride,
+            pipelined=args.pipeline,
+            percentiles=tuple(args.percentiles),
+            hasher=manifest.hasher(output_path) if manifest else None
         )
+    
+    if manifest:
+        manifest.save()
 
 
 if __name__ == "__main__":
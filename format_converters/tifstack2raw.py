@@ -1,8 +1,23 @@
 import os
 import sys
 import glob
+import json
+import time
+import argparse
+import contextlib
 import numpy as np
 import tifffile
+try:
+	from .tif_region import ChannelStack, resolve_region, read_tif_region
+except ImportError:
+	from tif_region import ChannelStack, resolve_region, read_tif_region
+try:
+	from byte_manipulators.checksums import Manifest
+	from byte_manipulators.raw_format import parse_roi, parse_stride
+except ImportError:
+	import _repo_root  # noqa: F401 (run as a script)
+	from byte_manipulators.checksums import Manifest
+	from byte_manipulators.raw_format import parse_roi, parse_stride
 
 # Mapping numpy dtype to string for filename
 DTYPE_MAP = {
@@ -16,21 +31,98 @@ DTYPE_MAP = {
 	np.dtype('float64'): 'double64'
 }
 
+# Precomputed weights for luminosity conversion (R,G,B)
+LUMA_WEIGHTS = np.array([0.2989, 0.5870, 0.1140], dtype=np.float32)
+
+# Stack header written next to the raw file, and the keys that identify it as ours
+STATE_SUFFIX = '.stack.json'
+STATE_KEYS = {'out_path', 'auto_name', 'files'}
+
 
 def get_datatype_str(dtype):
 	"""Return string representation for filename based on dtype."""
 	return DTYPE_MAP.get(dtype, str(dtype))
 
 
-def save_raw_volume(volume, out_path, dtype):
-	"""Save numpy volume to raw file in little-endian order."""
-	# Ensure little-endian byte order if applicable
-	if volume.dtype.byteorder not in ('<', '|'):
-		volume = volume.byteswap().view(volume.dtype.newbyteorder('<'))
-	volume.astype(dtype).tofile(out_path)
+def save_raw_volume(volume, out_path, dtype, hasher=None):
+	"""Save numpy volume to raw file in little-endian order.
+
+	If a hasher (see byte_manipulators/checksums.py) is given, the written bytes are fed to it.
+	"""
+	# Cast to the little-endian variant of dtype; numpy swaps bytes only when needed
+	# (native '=' arrays on little-endian hosts are written as-is)
+	data = volume.astype(np.dtype(dtype).newbyteorder('<'), copy=False)
+	if hasher is not None:
+		data = np.ascontiguousarray(data)
+		hasher.update(data)
+	data.tofile(out_path)
+
+
+def find_tif_files(prefix_path, glob_pattern=None):
+	"""Return the sorted list of TIFF files matching a prefix (see stack_tifs_to_raw)."""
+	prefix_dir = os.path.dirname(prefix_path) or '.'
+	prefix_base = os.path.basename(prefix_path)
+
+	if glob_pattern:
+		pattern = os.path.join(prefix_dir, glob_pattern)
+		return sorted(glob.glob(pattern))
+	patterns = [f"{prefix_base}*.tif", f"{prefix_base}*.tiff"]
+	files = []
+	for p in patterns:
+		files.extend(glob.glob(os.path.join(prefix_dir, p)))
+	return sorted(files)
+
+
+def probe_slice(path):
+	"""Read one TIFF header to get (height, width, dtype, color_to_gray)."""
+	with tifffile.TiffFile(path) as tif:
+		shape = tif.series[0].shape
+		dtype = tif.series[0].dtype
+	if len(shape) == 2:
+		height, width = shape
+		return height, width, dtype, False
+	if len(shape) == 3 and shape[-1] in (3, 4):
+		# Color image: convert to grayscale using luminosity method
+		height, width = shape[:2]
+		return height, width, dtype, True
+	raise ValueError(f"Unsupported image shape in file {path}: {shape}")
+
 
+def read_slice(path, height, width, dtype, color_to_gray, rows=None, cols=None):
+	"""Read a single TIFF slice and bring it to (height, width) of dtype.
 
-def stack_tifs_to_raw(prefix_path, out_path=None, glob_pattern=None):
+	rows/cols are optional resolved slices; only the tiles/strips intersecting
+	them are decoded and (height, width) is then the size of the cropped slice.
+	"""
+	if rows is None and cols is None:
+		img = tifffile.imread(path)
+	else:
+		roi = (slice(None), slice(rows.start, rows.stop), slice(cols.start, cols.stop))
+		img = read_tif_region(path, roi, (1, rows.step, cols.step))[0]
+	# Handle color images by converting to grayscale if needed
+	if img.ndim == 3 and img.shape[-1] in (3, 4):
+		if not color_to_gray:
+			# This shouldn't happen since we checked the first file, but be safe
+			raise ValueError(f"Found color image in file {path}; only single-channel TIFFs supported")
+		# drop alpha channel if present and compute luminosity
+		rgb = img[..., :3].astype(np.float32)
+		gray = np.tensordot(rgb, LUMA_WEIGHTS, axes=([-1], [0]))
+		# Clip and cast back to original dtype
+		if np.issubdtype(dtype, np.integer):
+			info = np.iinfo(dtype)
+			gray = np.rint(np.clip(gray, info.min, info.max)).astype(dtype)
+		else:
+			# float types
+			gray = gray.astype(dtype)
+		img = gray
+	if img.shape != (height, width):
+		raise ValueError(f"Image {path} has shape {img.shape} but expected {(height, width)}")
+	if img.dtype != dtype:
+		img = img.astype(dtype)
+	return img
+
+
+def stack_tifs_to_raw(prefix_path, out_path=None, glob_pattern=None, roi=None, stride=None, manifest=None):
 	"""Stack all TIFF files with a given prefix into a raw volume.
 
 	Args:
@@ -41,6 +133,10 @@ def stack_tifs_to_raw(prefix_path, out_path=None, glob_pattern=None):
 			'<prefix>_XxYxZ_<dtype>.raw'.
 		glob_pattern: Optional glob pattern to find files. If None, the function will
 			try common suffixes: '<prefix>*.tif', '<prefix>*.tiff'.
+		roi: Optional (z, y, x) slices as returned by raw_format.parse_roi. z indexes
+			the sorted file list; files outside the z-range are never opened.
+		stride: Optional (z, y, x) subsampling step.
+		manifest: Optional checksums.Manifest that records the checksums of the output.
 
 	Returns:
 		The path to the written raw file.
@@ -50,88 +146,397 @@ def stack_tifs_to_raw(prefix_path, out_path=None, glob_pattern=None):
 	prefix_base = os.path.basename(prefix_path)
 
 	# Build file list
-	if glob_pattern:
-		pattern = os.path.join(prefix_dir, glob_pattern)
-		files = sorted(glob.glob(pattern))
-	else:
-		patterns = [f"{prefix_base}*.tif", f"{prefix_base}*.tiff"]
-		files = []
-		for p in patterns:
-			files.extend(sorted(glob.glob(os.path.join(prefix_dir, p))))
-
+	files = find_tif_files(prefix_path, glob_pattern)
 	if not files:
 		raise FileNotFoundError(f"No TIFF files found for prefix '{prefix_path}'")
 
 	# Read first image to get shape and dtype
-	first = tifffile.imread(files[0])
-	color_to_gray = False
-	if first.ndim == 2:
-		height, width = first.shape
-		dtype = first.dtype
-	elif first.ndim == 3 and first.shape[-1] in (3, 4):
-		# Color image: convert to grayscale using luminosity method
-		color_to_gray = True
-		height, width = first.shape[:2]
-		dtype = first.dtype
+	height, width, dtype, color_to_gray = probe_slice(files[0])
+	if color_to_gray:
 		print("Note: color TIFFs detected. Converting to grayscale using luminosity method.")
-	else:
-		raise ValueError(f"Unsupported image shape in file {files[0]}: {first.shape}")
+
+	# Restrict to the region of interest before decoding anything
+	rows = cols = None
+	if roi is not None or stride is not None:
+		zs, rows, cols = resolve_region((len(files), height, width), roi, stride)
+		files = files[zs]
+		height = len(range(rows.start, rows.stop, rows.step))
+		width = len(range(cols.start, cols.stop, cols.step))
+		if not files or not height or not width:
+			raise ValueError(f"ROI selects an empty volume for prefix '{prefix_path}'")
 
 	# Create empty volume: depth x height x width
 	depth = len(files)
 	volume = np.empty((depth, height, width), dtype=dtype)
 
-	# Precompute weights for luminosity conversion (R,G,B)
-	weights = np.array([0.2989, 0.5870, 0.1140], dtype=np.float32)
-
 	# Fill volume
 	for i, f in enumerate(files):
-		img = tifffile.imread(f)
-		# Handle color images by converting to grayscale if needed
-		if img.ndim == 3 and img.shape[-1] in (3, 4):
-			if not color_to_gray:
-				# This shouldn't happen since we checked the first file, but be safe
-				raise ValueError(f"Found color image in file {f}; only single-channel TIFFs supported")
-			# drop alpha channel if present and compute luminosity
-			rgb = img[..., :3].astype(np.float32)
-			gray = np.tensordot(rgb, weights, axes=([-1], [0]))
-			# Clip and cast back to original dtype
-			if np.issubdtype(dtype, np.integer):
-				info = np.iinfo(dtype)
-				gray = np.rint(np.clip(gray, info.min, info.max)).astype(dtype)
-			else:
-				# float types
-				gray = gray.astype(dtype)
-			img = gray
-		if img.shape != (height, width):
-			raise ValueError(f"Image {f} has shape {img.shape} but expected {(height, width)}")
-		if img.dtype != dtype:
-			img = img.astype(dtype)
-		volume[i, ...] = img
+		volume[i, ...] = read_slice(f, height, width, dtype, color_to_gray, rows, cols)
 
 	# Compose output filename if not provided
+	state_path = _state_path(prefix_path, out_path)
+	auto_name = out_path is None
 	if out_path is None:
 		dtype_str = get_datatype_str(dtype)
 		base = prefix_base
 		out_name = f"{base}_{width}x{height}x{depth}_{dtype_str}.raw"
 		out_path = os.path.join(prefix_dir, out_name)
 
-	save_raw_volume(volume, out_path, dtype)
+	save_raw_volume(volume, out_path, dtype, manifest.hasher(out_path) if manifest else None)
+
+	# Record the stored slices so a later --append only decodes new ones;
+	# a cropped volume cannot be extended, so an older header of ours is dropped
+	existing = _read_state(state_path)
+	if existing is False:
+		print(f"Note: {state_path} is not a stack header, not recording the slices for --append")
+	elif rows is None:
+		_write_state(state_path, {
+			'out_path': _state_relpath(out_path, state_path),
+			'auto_name': auto_name,
+			'width': width,
+			'height': height,
+			'depth': depth,
+			'dtype': np.dtype(dtype).str,
+			'color_to_gray': color_to_gray,
+			'files': [_state_relpath(f, state_path) for f in files],
+		})
+	elif existing:
+		os.remove(state_path)
+	return out_path
+
+
+def split_tifs_to_raw(prefix_path, out_dir=None, glob_pattern=None, roi=None, stride=None, manifest=None):
+	"""Stack multi-channel TIFF slices into one raw volume per channel.
+
+	Each slice file is decoded once and its channels are appended to the N
+	output files as slices are processed, instead of one pass per channel.
+
+	Args:
+		prefix_path, glob_pattern, roi, stride, manifest: see stack_tifs_to_raw.
+		out_dir: Optional output directory (default: next to the prefix). Files
+			are named '<prefix>_c<i>_XxYxZ_<dtype>.raw'.
+
+	Returns:
+		List of the written raw file paths, one per channel.
+	"""
+	prefix_dir = os.path.dirname(prefix_path) or '.'
+	prefix_base = os.path.basename(prefix_path)
+
+	files = find_tif_files(prefix_path, glob_pattern)
+	if not files:
+		raise FileNotFoundError(f"No TIFF files found for prefix '{prefix_path}'")
+	zs = resolve_region((len(files), 1, 1), roi, stride)[0]
+	files = files[zs]
+	if not files:
+		raise ValueError(f"ROI selects no slices for prefix '{prefix_path}'")
+	# Crop y/x inside each single-slice file
+	roi_yx = (slice(None),) + tuple(roi[1:]) if roi is not None else None
+	stride_yx = (1,) + tuple(stride[1:]) if stride is not None else None
+
+	with tifffile.TiffFile(files[0]) as tif:
+		first = ChannelStack(tif, roi_yx, stride_yx)
+		_, height, width = first.shape
+		channels, dtype = first.channels, first.dtype
+	print(f"Splitting {channels} channel(s) of {len(files)} slice(s)")
+
+	dtype_str = get_datatype_str(dtype)
+	out_paths = [
+		os.path.join(out_dir or prefix_dir, f"{prefix_base}_c{c}_{width}x{height}x{len(files)}_{dtype_str}.raw")
+		for c in range(channels)
+	]
+	if out_dir:
+		os.makedirs(out_dir, exist_ok=True)
+	with contextlib.ExitStack() as outputs:
+		outs = [outputs.enter_context(open(p, 'wb')) for p in out_paths]
+		hashers = [manifest.hasher(p) if manifest else None for p in out_paths]
+		for f in files:
+			with tifffile.TiffFile(f) as tif:
+				stack = ChannelStack(tif, roi_yx, stride_yx)
+				if stack.shape != (1, height, width) or stack.channels != channels:
+					raise ValueError(f"Image {f} has {stack.channels} channel(s) of {stack.shape[1:]} "
+						f"but expected {channels} of {(height, width)}")
+				for planes in stack:
+					for fh, hasher, plane in zip(outs, hashers, planes):
+						save_raw_volume(plane, fh, dtype, hasher)
+	return out_paths
+
+
+def _state_path(prefix_path, out_path):
+	"""Location of the JSON header recording which slices are in the raw file."""
+	if out_path is not None:
+		return out_path + STATE_SUFFIX
+	return prefix_path + STATE_SUFFIX
+
+
+def _read_state(state_path):
+	"""Load a stack header; None if there is none, False if the file is not one of ours."""
+	if not os.path.exists(state_path):
+		return None
+	try:
+		with open(state_path) as fp:
+			state = json.load(fp)
+	except ValueError:
+		return False
+	if not isinstance(state, dict) or not STATE_KEYS <= set(state):
+		return False
+	return state
+
+
+def _state_relpath(path, state_path):
+	"""Store paths relative to the header, so the stack can be reopened from any directory."""
+	return os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(state_path)))
+
+
+def _state_abspath(rel_path, state_path):
+	"""Resolve a path stored in the header (see _state_relpath)."""
+	return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(state_path)), rel_path))
+
+
+def _write_state(state_path, state):
+	"""Atomically replace the JSON header next to the raw file."""
+	tmp_path = state_path + '.tmp'
+	with open(tmp_path, 'w') as fp:
+		json.dump(state, fp, indent=1)
+	os.replace(tmp_path, state_path)
+
+
+def _finalize_name(prefix_path, state, state_path):
+	"""Rename an auto-named raw file so its name reflects the current depth."""
+	current = _state_abspath(state['out_path'], state_path)
+	if not state['auto_name']:
+		return current
+	prefix_dir = os.path.dirname(prefix_path) or '.'
+	prefix_base = os.path.basename(prefix_path)
+	dtype_str = get_datatype_str(np.dtype(state['dtype']))
+	out_name = f"{prefix_base}_{state['width']}x{state['height']}x{state['depth']}_{dtype_str}.raw"
+	out_path = os.path.join(prefix_dir, out_name)
+	if os.path.abspath(out_path) != current:
+		os.replace(current, out_path)
+		state['out_path'] = _state_relpath(out_path, state_path)
 	return out_path
 
 
-def _cli():
-	if len(sys.argv) < 2 or len(sys.argv) > 4:
-		print("Usage: python tifstack2raw.py <prefix_path> [out_path] [glob_pattern]")
-		print("Example: python tifstack2raw.py ./slice_ ./stack.raw 'slice_*.tif'")
+class IncrementalStack:
+	"""Raw volume that grows by appending slices as new TIFFs appear.
+
+	The slices already stored in the raw file are recorded in a small JSON header
+	('<prefix>.stack.json', or '<out_path>.stack.json' when out_path is given)
+	holding the geometry, dtype and ordered file list. Paths in the header are
+	relative to it. Reopening the stack only decodes files that are not in that list.
+	"""
+
+	def __init__(self, prefix_path, out_path=None, glob_pattern=None):
+		self.prefix_path = prefix_path
+		self.glob_pattern = glob_pattern
+		self.state_path = _state_path(prefix_path, out_path)
+		self.state = None
+		state = _read_state(self.state_path)
+		if state is False:
+			raise ValueError(f"{self.state_path} exists but is not a stack header; move it away first")
+		if state and os.path.exists(_state_abspath(state['out_path'], self.state_path)):
+			self.state = state
+		self._requested_out = out_path
+
+	@property
+	def out_path(self):
+		return _state_abspath(self.state['out_path'], self.state_path) if self.state else None
+
+	@property
+	def depth(self):
+		return self.state['depth'] if self.state else 0
+
+	def _init_state(self, first_file):
+		height, width, dtype, color_to_gray = probe_slice(first_file)
+		if color_to_gray:
+			print("Note: color TIFFs detected. Converting to grayscale using luminosity method.")
+		auto_name = self._requested_out is None
+		if auto_name:
+			prefix_dir = os.path.dirname(self.prefix_path) or '.'
+			prefix_base = os.path.basename(self.prefix_path)
+			out_path = os.path.join(prefix_dir, f"{prefix_base}_{width}x{height}x0_{get_datatype_str(dtype)}.raw")
+		else:
+			out_path = self._requested_out
+		# Start from an empty file; stale data from a previous full run is discarded
+		open(out_path, 'wb').close()
+		self.state = {
+			'out_path': _state_relpath(out_path, self.state_path),
+			'auto_name': auto_name,
+			'width': width,
+			'height': height,
+			'depth': 0,
+			'dtype': np.dtype(dtype).str,
+			'color_to_gray': color_to_gray,
+			'files': [],
+		}
+		_write_state(self.state_path, self.state)
+
+	def pending_files(self, files=None):
+		"""Return the files not yet stored in the raw volume, in stack order."""
+		if files is None:
+			files = find_tif_files(self.prefix_path, self.glob_pattern)
+		if self.state is None:
+			return files
+		# Compare in the header's spelling, whatever directory or prefix form we were called with
+		done = set(self.state['files'])
+		last = self.state['files'][-1] if self.state['files'] else None
+		pending = [(_state_relpath(f, self.state_path), f) for f in files]
+		pending = sorted(p for p in pending if p[0] not in done)
+		if last is not None and pending and pending[0][0] < last:
+			raise ValueError(f"New slice {pending[0][1]} sorts before already stored slice "
+				f"{_state_abspath(last, self.state_path)}; rebuild the volume with stack_tifs_to_raw instead")
+		return [f for _, f in pending]
+
+	def append(self, files):
+		"""Decode and append the given slices, then update the header.
+
+		Returns the number of slices appended.
+		"""
+		if not files:
+			return 0
+		if self.state is None:
+			self._init_state(files[0])
+		state = self.state
+		dtype = np.dtype(state['dtype'])
+		height, width = state['height'], state['width']
+		slice_bytes = height * width * dtype.itemsize
+		with open(self.out_path, 'r+b') as fh:
+			# Drop a partially written slice left behind by an interrupted run
+			fh.truncate(state['depth'] * slice_bytes)
+			fh.seek(0, os.SEEK_END)
+			for f in files:
+				img = read_slice(f, height, width, dtype, state['color_to_gray'])
+				save_raw_volume(img, fh, dtype)
+				state['files'].append(_state_relpath(f, self.state_path))
+				state['depth'] += 1
+		_write_state(self.state_path, state)
+		return len(files)
+
+	def finalize(self):
+		"""Rename the raw file to its current depth and rewrite the header."""
+		if self.state is None:
+			return None
+		out_path = _finalize_name(self.prefix_path, self.state, self.state_path)
+		_write_state(self.state_path, self.state)
+		return out_path
+
+
+def append_tifs_to_raw(prefix_path, out_path=None, glob_pattern=None):
+	"""Append only the TIFF slices not yet stored in a previously written raw volume.
+
+	Same arguments as stack_tifs_to_raw. On the first call the raw file is created
+	from all matching slices; later calls decode just the new ones.
+
+	Returns:
+		The path to the raw file (renamed to the new depth when auto-named).
+	"""
+	stack = IncrementalStack(prefix_path, out_path, glob_pattern)
+	pending = stack.pending_files()
+	if stack.state is None and not pending:
+		raise FileNotFoundError(f"No TIFF files found for prefix '{prefix_path}'")
+	added = stack.append(pending)
+	print(f"Appended {added} slice(s), depth is now {stack.depth}")
+	return stack.finalize()
+
+
+def watch_tifs_to_raw(prefix_path, out_path=None, glob_pattern=None, interval=5.0, idle_timeout=None):
+	"""Poll for new TIFF slices and extend the raw volume as they land.
+
+	A file is only appended once its size is unchanged between two polls, so slices
+	still being written by the acquisition software are skipped until complete.
+	Runs until interrupted (Ctrl+C) or until no new slice arrived for idle_timeout
+	seconds, then renames the raw file to its final depth.
+
+	Returns:
+		The path to the raw file.
+	"""
+	stack = IncrementalStack(prefix_path, out_path, glob_pattern)
+	last_sizes = {}
+	last_growth = time.monotonic()
+	print(f"Watching '{prefix_path}' every {interval}s (Ctrl+C to stop)")
+	try:
+		while True:
+			pending = stack.pending_files()
+			sizes = {}
+			for f in pending:
+				try:
+					sizes[f] = os.path.getsize(f)
+				except OSError:
+					sizes[f] = None
+			# Keep stack order: stop at the first slice that is still growing
+			ready = []
+			for f in pending:
+				if sizes[f] is None or last_sizes.get(f) != sizes[f]:
+					break
+				ready.append(f)
+			last_sizes = sizes
+			if ready:
+				added = stack.append(ready)
+				last_growth = time.monotonic()
+				print(f"Appended {added} slice(s), depth is now {stack.depth}")
+			elif idle_timeout is not None and time.monotonic() - last_growth > idle_timeout:
+				print(f"No new slices for {idle_timeout}s, stopping.")
+				break
+			time.sleep(interval)
+	except KeyboardInterrupt:
+		print("Stopping watch.")
+	return stack.finalize()
+
+
+def _cli(argv=None):
+	parser = argparse.ArgumentParser(
+		description='Stack TIFF slices with a common prefix into a raw volume',
+		epilog="Example: python tifstack2raw.py ./slice_ ./stack.raw 'slice_*.tif'")
+	parser.add_argument('prefix', help='File prefix or directory+prefix of the TIFF slices')
+	parser.add_argument('out_path', nargs='?', default=None,
+		help='Output raw path (default: <prefix>_XxYxZ_<dtype>.raw)')
+	parser.add_argument('glob_pattern', nargs='?', default=None,
+		help='Glob pattern to find files (default: <prefix>*.tif and <prefix>*.tiff)')
+	parser.add_argument('--append', action='store_true',
+		help='Only append slices not yet stored in the raw file')
+	parser.add_argument('--watch', nargs='?', type=float, const=5.0, default=None, metavar='SECONDS',
+		help='Keep polling for new slices every SECONDS (default 5) and append them')
+	parser.add_argument('--idle-timeout', type=float, default=None, metavar='SECONDS',
+		help='With --watch, stop after SECONDS without new slices')
+	parser.add_argument('--roi', type=parse_roi, default=None, metavar='z0:z1,y0:y1,x0:x1',
+		help='Only read this sub-box; z indexes the sorted slice files')
+	parser.add_argument('--stride', type=parse_stride, default=None, metavar='N|Z,Y,X',
+		help='Subsample by this step along each axis')
+	parser.add_argument('--split-channels', action='store_true',
+		help='Write one raw volume per channel (out_path is then an output directory)')
+	parser.add_argument('--manifest', metavar='PATH',
+		help='Record chunked checksums of the written raw file(s) in this JSON manifest')
+	args = parser.parse_args(argv)
+	if (args.roi or args.stride) and (args.append or args.watch is not None):
+		parser.error('--roi/--stride cannot be combined with --append or --watch')
+	if args.split_channels and (args.append or args.watch is not None):
+		parser.error('--split-channels cannot be combined with --append or --watch')
+	if args.manifest and (args.append or args.watch is not None):
+		parser.error('--manifest cannot be combined with --append or --watch (the file is extended over several runs)')
+	manifest = Manifest(args.manifest) if args.manifest else None
+
+	if args.split_channels:
+		for out_file in split_tifs_to_raw(args.prefix, out_dir=args.out_path, glob_pattern=args.glob_pattern,
+				roi=args.roi, stride=args.stride, manifest=manifest):
+			print(f"Saved raw volume: {out_file}")
+		if manifest:
+			manifest.save()
+		return
+
+	if args.watch is not None:
+		out_file = watch_tifs_to_raw(args.prefix, out_path=args.out_path, glob_pattern=args.glob_pattern,
+			interval=args.watch, idle_timeout=args.idle_timeout)
+	elif args.append:
+		out_file = append_tifs_to_raw(args.prefix, out_path=args.out_path, glob_pattern=args.glob_pattern)
+	else:
+		out_file = stack_tifs_to_raw(args.prefix, out_path=args.out_path, glob_pattern=args.glob_pattern,
+			roi=args.roi, stride=args.stride, manifest=manifest)
+	if out_file is None:
+		print(f"No TIFF files found for prefix '{args.prefix}'")
 		sys.exit(1)
-	prefix = sys.argv[1]
-	out = sys.argv[2] if len(sys.argv) >= 3 else None
-	g = sys.argv[3] if len(sys.argv) == 4 else None
-	out_file = stack_tifs_to_raw(prefix, out_path=out, glob_pattern=g)
 	print(f"Saved raw volume: {out_file}")
+	if manifest:
+		manifest.save()
 
 
 if __name__ == '__main__':
 	_cli()
-
@@ -1,3 +1,4 @@
+import sys
 import numpy as np
 
 def generate_3d_custom_direction_grid(size, direction, output_file):
@@ -33,10 +34,23 @@ def generate_3d_custom_direction_grid(size, direction, output_file):
     with open(output_file, 'wb') as file:
         file.write(scalar_values.tobytes())
 
-# Get user input for grid dimensions and direction
-size = int(input("Enter the size of the grid: "))
-direction = input("Enter the direction (X, Y, or Z) in which values will decrease: ")
-output_file = input("Enter the output file name: ")
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) == 3:
+        size, direction, output_file = int(argv[0]), argv[1], argv[2]
+    elif not argv:
+        # Get user input for grid dimensions and direction
+        size = int(input("Enter the size of the grid: "))
+        direction = input("Enter the direction (X, Y, or Z) in which values will decrease: ")
+        output_file = input("Enter the output file name: ")
+    else:
+        print("Usage: python createGrid.py [size direction output_file]")
+        sys.exit(1)
+
+    # Generate and save the 3D gradient grid in the specified direction
+    generate_3d_custom_direction_grid(size, direction, output_file)
+
+if __name__ == "__main__":
+    main()
 
-# Generate and save the 3D gradient grid in the specified direction
-generate_3d_custom_direction_grid(size, direction, output_file)
@@ -1,9 +1,8 @@
-import sys
+import os
 import re
-
-if len(sys.argv)!=2:
-    print('Error: invalid parameter count')
-    exit()
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 class bcolors:
     HEADER = '\033[95m'
@@ -16,60 +15,155 @@ class bcolors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
-entry_types = ('@article', '@book', '@booklet', '@conference', '@inbook',
-        '@incollection', '@inproceedings', '@manual', '@masterthesis', 
-        '@misc', '@phdtehsis', '@proceedings', '@techreport', '@unpublished',
-        '@ARTICLE', '@BOOK', '@BOOKLET', '@CONFERENCE', '@INBOOK',
-        '@INCOLLECTION', '@INPROCEEDINGS', '@MANUAL', '@MASTERTHESIS', 
-        '@MISC', '@PHDTHESIS', '@PROCEEDINGS', '@TECHREPORT', '@UNPUBLISHED',)
+entry_types = ('article', 'book', 'booklet', 'conference', 'inbook',
+        'incollection', 'inproceedings', 'manual', 'mastersthesis', 'masterthesis',
+        'misc', 'phdthesis', 'proceedings', 'techreport', 'unpublished',)
 
-with open(sys.argv[1], "r") as fp, open('new.bib', 'w') as new_file :
-    for line in fp:
-        if line.lower().startswith(entry_types):
-            entry_name_s = line.index('{')+1
-            entry_name_e = line.index(',')
-            entry_name = line[entry_name_s:entry_name_e]
-
-            entry_name = entry_name.capitalize() #1)make first author name capital
-
-            date_s = re.search(r'\d', entry_name) #2)reformat dates
-            no_date = False
-            if not date_s:
-                print('Warning: No date found for entry ', entry_name)
-                no_date = True
-            else:
-                date_s = date_s.start(0)
-                date_e = re.match('.+([0-9])[^0-9]*$', entry_name).start(1)+1
-                if date_e - date_s >= 5:    #handle if paper title cue includes a number
-                    if entry_name[date_s + 4].isdigit():
-                        date_e = date_s + 4
-                    elif entry_name[date_s + 2].isdigit():
-                        date_e = date_s + 2
-                elif  date_e - date_s == 3: #handle if paper title cue includes a number
-                    date_e = date_s + 2
-
-                if (date_e - date_s != 4) and (date_e - date_s !=2):
-                    print('Warning: No date found for entry ', entry_name, date_e - date_s)
-                    no_date = True
-                if date_e - date_s ==2:
-                    if int(entry_name[date_s:date_e]) > 22:
-                        print("Warning: reformatting 2 digit dates to 4 digits by adding '19'. Please check entry", entry_name)
-                        entry_name = entry_name[:date_s] + '19' + entry_name[date_s:]
-                    else:
-                            print("Warning: reformatting 2 digit dates to 4 digits by adding '20'. Please check entry", entry_name)
-                            entry_name = entry_name[:date_s] + '20' + entry_name[date_s:]
-                    date_e +=2
-                #print(entry_name[date_s:date_e])
-
-            if (not no_date) and not (date_e == entry_name[-1]): #reformat title alias
-                entry_name = entry_name[:date_e] + entry_name[date_e:].capitalize()
+#matches the first line of an entry and captures its citation key (everything between '{' and ',')
+#'book' also covers '@booklet' etc. the same way the old startswith check did
+entry_re = re.compile(r'@(?:' + '|'.join(entry_types) + r')[^{]*\{([^,\n]*),', re.IGNORECASE)
+#any line that starts a new bibtex item (entry, @string, @comment, ...)
+item_start_re = re.compile(r'\s*@')
+first_digit_re = re.compile(r'\d')
+last_digit_re = re.compile(r'.+([0-9])[^0-9]*$')
+
+#reformat a citation key: capital first author name, 4 digit year and capital title alias
+def normalize_key(entry_name):
+    entry_name = entry_name.capitalize() #1)make first author name capital
+
+    date_s = first_digit_re.search(entry_name) #2)reformat dates
+    no_date = False
+    if not date_s:
+        print('Warning: No date found for entry ', entry_name)
+        no_date = True
+    else:
+        date_s = date_s.start(0)
+        date_e = last_digit_re.match(entry_name).start(1)+1
+        if date_e - date_s >= 5:    #handle if paper title cue includes a number
+            if entry_name[date_s + 4].isdigit():
+                date_e = date_s + 4
+            elif entry_name[date_s + 2].isdigit():
+                date_e = date_s + 2
+        elif  date_e - date_s == 3: #handle if paper title cue includes a number
+            date_e = date_s + 2
+
+        if (date_e - date_s != 4) and (date_e - date_s !=2):
+            print('Warning: No date found for entry ', entry_name, date_e - date_s)
+            no_date = True
+        if date_e - date_s ==2:
+            if int(entry_name[date_s:date_e]) > 22:
+                print("Warning: reformatting 2 digit dates to 4 digits by adding '19'. Please check entry", entry_name)
+                entry_name = entry_name[:date_s] + '19' + entry_name[date_s:]
             else:
-                    print('Warning: No alias found for entry ', entry_name)
-            #print(entry_name)
-            line = line.replace( line[entry_name_s:entry_name_e], entry_name)
-        new_file.write(line)
-        
-            #print(line)
-#fp = open(sys.argv[1], "r+")
-
-#print(data)
\ No newline at end of file
+                print("Warning: reformatting 2 digit dates to 4 digits by adding '20'. Please check entry", entry_name)
+                entry_name = entry_name[:date_s] + '20' + entry_name[date_s:]
+            date_e +=2
+
+    if not no_date: #reformat title alias
+        entry_name = entry_name[:date_e] + entry_name[date_e:].capitalize()
+    else:
+        print('Warning: No alias found for entry ', entry_name)
+    return entry_name
+
+#yields lists of lines, one per bibtex item (plus any text before the first item)
+def read_items(fp):
+    item = []
+    for line in fp:
+        if item_start_re.match(line) and item:
+            yield item
+            item = []
+        item.append(line)
+    if item:
+        yield item
+
+#normalize the keys of one .bib file into out_path in a single streaming pass
+#keys are indexed case-insensitively (bibtex treats Smith2020Foo and smith2020foo as the same key);
+#a repeated key with an identical body is a duplicate, otherwise it is a collision.
+#collisions are reported, or renamed with a letter suffix (b, c, ...) if rename_collisions is set.
+#returns the index {lowercase key: (key, line number)}
+def format_bib(in_path, out_path='new.bib', rename_collisions=False, drop_duplicates=False):
+    index = {}
+    bodies = {}
+    line_no = 1
+    with open(in_path, "r") as fp, open(out_path, 'w') as new_file:
+        for item in read_items(fp):
+            start_line = line_no
+            line_no += len(item)
+            match = entry_re.match(item[0].lstrip())
+            if not match:
+                new_file.writelines(item)
+                continue
+            offset = len(item[0]) - len(item[0].lstrip())
+            key_s, key_e = match.start(1) + offset, match.end(1) + offset
+            entry_name = normalize_key(item[0][key_s:key_e])
+
+            #whitespace and blank lines between entries do not make two entries different
+            body_hash = hashlib.sha1(''.join(line.strip() for line in item[1:]).encode('utf-8')).digest()
+            folded = entry_name.lower()
+            if folded in index:
+                first_name, first_line = index[folded]
+                if bodies[folded] == body_hash:
+                    print(bcolors.WARNING + f'Warning: {in_path}:{start_line} duplicate of entry {first_name} (line {first_line})' + bcolors.ENDC)
+                    if drop_duplicates:
+                        continue
+                elif rename_collisions:
+                    suffix = ord('b')
+                    while (entry_name + chr(suffix)).lower() in index:
+                        suffix += 1
+                    print(bcolors.WARNING + f'Warning: {in_path}:{start_line} key {entry_name} collides with line {first_line}, renamed to {entry_name + chr(suffix)}' + bcolors.ENDC)
+                    entry_name += chr(suffix)
+                    folded = entry_name.lower()
+                else:
+                    print(bcolors.WARNING + f'Warning: {in_path}:{start_line} key {entry_name} collides with entry {first_name} (line {first_line})' + bcolors.ENDC)
+            if folded not in index:
+                index[folded] = (entry_name, start_line)
+                bodies[folded] = body_hash
+
+            item[0] = item[0][:key_s] + entry_name + item[0][key_e:]
+            new_file.writelines(item)
+    return index
+
+def _format_bib_job(args):
+    in_path, out_path, rename_collisions, drop_duplicates = args
+    return in_path, format_bib(in_path, out_path, rename_collisions, drop_duplicates)
+
+#normalize several .bib files in parallel worker processes, then report keys shared between files
+#returns {in_path: out_path}
+def format_bib_files(in_paths, out_dir=None, rename_collisions=False, drop_duplicates=False, workers=None):
+    jobs = []
+    for in_path in in_paths:
+        stem = os.path.splitext(os.path.basename(in_path))[0]
+        out_path = os.path.join(out_dir or os.path.dirname(in_path), stem + '_new.bib')
+        jobs.append((in_path, out_path, rename_collisions, drop_duplicates))
+
+    owners = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for in_path, index in executor.map(_format_bib_job, jobs):
+            for folded, (entry_name, line) in index.items():
+                if folded in owners:
+                    other_path, other_name, other_line = owners[folded]
+                    print(bcolors.WARNING + f'Warning: {in_path}:{line} key {entry_name} also used in {other_path}:{other_line} ({other_name})' + bcolors.ENDC)
+                else:
+                    owners[folded] = (in_path, entry_name, line)
+    return {job[0]: job[1] for job in jobs}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Normalize citation keys of .bib files (Author2020Title)')
+    parser.add_argument('inputs', nargs='+', help='.bib file(s) to normalize')
+    parser.add_argument('-o', '--output', help='output .bib file (default: new.bib), or output directory when several inputs are given')
+    parser.add_argument('-r', '--rename-collisions', action='store_true', help='rename colliding keys with a letter suffix instead of only reporting them')
+    parser.add_argument('-d', '--drop-duplicates', action='store_true', help='drop entries whose key and body repeat an earlier entry')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes when several inputs are given (default: all cores)')
+    args = parser.parse_args(argv)
+
+    if len(args.inputs) == 1:
+        format_bib(args.inputs[0], args.output or 'new.bib', args.rename_collisions, args.drop_duplicates)
+    else:
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+        outputs = format_bib_files(args.inputs, args.output, args.rename_collisions, args.drop_duplicates, args.jobs)
+        for in_path, out_path in outputs.items():
+            print(in_path, '->', out_path)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
 #reads a bibtex file and creates a html file with the papers
 
 #get file name from command line
+import os
+import re
 import sys
+import json
+import hashlib
+import functools
 import bibtexparser
 from bibtexparser.bwriter import BibTexWriter
+from bibtexparser.bibdatabase import BibDatabase
 # Import unidecode module from unidecode
 from unidecode import unidecode
 import datetime
@@ -23,47 +29,139 @@ month_ranks = {
     'dec': 12
 }
 
-print_pubs = True
-print_teaser = True
-
-file_name = sys.argv[1]
-#check if 2nd parameter is given
-if len(sys.argv) > 2:
-    #if its "-t-only" or "--teaser-only" then set print_pubs to false
-    if sys.argv[2] == "-t-only" or sys.argv[2] == "--teaser-only":
-        print_pubs = False
-    #if its "-p-only" or "--pubs-only" then set print_teaser to false
-    elif sys.argv[2] == "-p-only" or sys.argv[2] == "--pubs-only":
-        print_teaser = False
-    else:
-        print("Invalid parameter")
-        sys.exit()
+#author whose name is printed in bold
+highlight_author = 'Sahistan, Alper'
+
+#bibtex umlauts and accents and the characters they stand for
+latex_accents = {
+    '{"a}': 'ä',
+    '{"o}': 'ö',
+    '{"u}': 'ü',
+    '\\"u': 'ü',
+    '{"A}': 'Ä',
+    '{"O}': 'Ö',
+    '{"U}': 'Ü',
+    '{"s}': 'ß',
+    '\\c{c}': 'ç',
+    '\\c{C}': 'Ç',
+    #'\\u{g}': 'ğ',
+    #'\\u{G}': 'Ğ',
+    '{\\i}': 'ı',
+    '\\.{I}': 'İ',
+    '\\c{s}': 'ş',
+    '\\c{S}': 'Ş',
+}
+#one alternation of all accents (longest first) so a name is translated in a single pass
+latex_accents_re = re.compile('|'.join(re.escape(k) for k in sorted(latex_accents, key=len, reverse=True)))
+
+#html templates, filled with str.format
+teaser_head_template = (
+    '<ul>\n'
+    '        <li class="row" id="extra-info-text">\n'
+    '            <div class="col s12 l12">\n'
+    '                <!--TEASER IMAGES here-->\n'
+    '            </div>\n'
+    '            <p class="col s12 m12 l12" id = "extra-info-text">'
+)
+teaser_body_template = (
+    '{title} \n\t\t\t\t\t\t'
+    '<b>{booktitle}</b>\n'
+    '<a href= + LINK HERE> <i class="material-icons icon-light">picture_as_pdf</i></a>'
+    '<a class=" modal-trigger" href="#modal{counter}"><i class="icon-light" style="font-family: Source Code Pro">BibTeX</i></a></p>'
+    '\n\t\t</li>\n</ul>\n'
+    '<!-- Modal -->\n'
+    '<div id="modal{counter}" class="modal">\n'
+    '\t <div class="modal-content" id="citation-box">\n\n'
+    '            \t\t<h4>BibTeX citation</h4>\n\n'
+    '            \t\t\t<div class="card-panel" id ="citation-text">\n\n'
+    '            \t\t\t\t<p type="text" id="paper{counter}">'
+    '@{bibtex}'
+    '</p>\n'
+    '            </div>\n'
+    '            <div class="row">\n'
+    '            <div class="col m11"></div>\n'
+    '            <a class="button col m1" onclick="copyToClipboard(\'paper{counter}\')"\n'
+    ' style="position: absolute; right: 0;"><i class="material-icons">copy_all</i></a>\n'
+    '            </div>\n'
+    '        </div>\n'
+    '        </div>\n'
+)
+pubs_head_template = (
+    '<div class="col s12 m12">\n'
+    '        \t<h2>{year}</h2>\n'
+    '        \t<hr>\n'
+)
+year_template = (
+    '\n'
+    '                \t<h2>{year}</h2>\n'
+    '                \t<hr>\n'
+)
+card_head_template = (
+    '\t\t<div class="row">\n'
+    '        \t\t\t<div class="col s12 m12">\n'
+    '        \t\t\t\t<div class="card" style="background-color:#1c415b;">\n'
+    '        \t\t\t\t\t<div class="card-content white-text">\n'
+    '        \t\t\t\t\t\t<div class="row">\n'
+    '        \t\t\t\t\t\t\t<div class="col s6 m6">\n'
+    '        \t\t\t\t\t\t\t\t<!--Teaser Images here-->\n'
+    '        \t\t\t\t\t\t\t</div>\n'
+    '        \t\t\t\t\t\t</div>\n'
+    '\t\t\t\t\t\t<span class="card-title">{title}</span>\n'
+    '        \t\t\t\t\t\t<p><i>{booktitle}</i></p>\n'
+    '\t\t\t\t\t\t<p>Authors: '
+)
+card_body_template = (
+    '\t\t\t\t\t</div>\n'
+    '        \t\t\t\t\t<div class="card-action">\n'
+    '        \t\t\t\t\t\t<a href= + LINK HERE> <i class="material-icons icon-light">picture_as_pdf</i></a>\n'
+    '        \t\t\t\t\t\t<a class=" modal-trigger" href="#modal{counter}"><i class="icon-light" style="font-family: Source Code Pro; text-transform: none">BibTeX</i></a>\n'
+    '        \t\t\t\t\t</div>\n'
+    '        \t\t\t\t</div>\n'
+    '        \t\t\t</div>\n'
+    '        \t\t</div>\n'
+    '\t\t<!-- Modal -->\n'
+    '\t\t<div id="modal{counter}" class="modal">\n'
+    '\t\t\t <div class="modal-content" id="citation-box">\n'
+    '        \t\t\t\t<h4>BibTeX citation</h4>\n'
+    '        \t\t\t\t\t<div class="card-panel" id ="citation-text">\n'
+    '        \t\t\t\t\t\t<p type="text" id="paper{counter}">\n'
+    '{bibtex}'
+    '\t\t\t\t\t\t</p>\n'
+    '        \t\t\t\t\t</div>\n'
+    '        \t\t\t\t\t<div class="row">\n'
+    '        \t\t\t\t\t\t<div class="col m11"></div>\n'
+    '        \t\t\t\t\t\t<a class="button col m1" onclick="copyToClipboard(\'paper{counter}\')"\n'
+    '\t\t\t\t\t\t style="position: absolute; right: 0;"><i class="material-icons">copy_all</i></a>\n'
+    '        \t\t\t\t\t</div>\n'
+    '        \t\t\t</div>\n'
+    '        \t\t</div>\n'
+)
 
 #process author
-#a function that takes author name and shortens the first names to initials 
+#a function that takes author name and shortens the first names to initials
 #and add a period
+#memoized: co-authors repeat across hundreds of entries
+@functools.lru_cache(maxsize=None)
 def process_author_name(author):
     dict = bibtexparser.customization.splitname(author)
     shortened_name = str(dict.get('first')[0][0]) + '. ' + str(dict.get('last')[0])
 
     #convert bibtex umlauts to ASCII characters
-    shortened_name = shortened_name.replace('{\"a}', 'ä')
-    shortened_name = shortened_name.replace('{\"o}', 'ö')
-    shortened_name = shortened_name.replace('{\"u}', 'ü')
-    shortened_name = shortened_name.replace('\\"u', 'ü')
-    shortened_name = shortened_name.replace('{\"A}', 'Ä')
-    shortened_name = shortened_name.replace('{\"O}', 'Ö')
-    shortened_name = shortened_name.replace('{\"U}', 'Ü')
-    shortened_name = shortened_name.replace('{\"s}', 'ß')
-    shortened_name = shortened_name.replace('\c{c}', 'ç')
-    shortened_name = shortened_name.replace('\c{C}', 'Ç')
-    #shortened_name = shortened_name.replace('\u{g}', 'ğ')
-    #shortened_name = shortened_name.replace('\u{G}', 'Ğ')
-    shortened_name = shortened_name.replace('{\i}', 'ı')
-    shortened_name = shortened_name.replace('\.{I}', 'İ')
-    shortened_name = shortened_name.replace('\c{s}', 'ş')
-    shortened_name = shortened_name.replace('\c{S}', 'Ş')
-    return shortened_name
+    return latex_accents_re.sub(lambda m: latex_accents[m.group(0)], shortened_name)
+
+#html for one author, highlighted author in bold and everyone else transliterated to ASCII
+@functools.lru_cache(maxsize=None)
+def format_author(author):
+    if author == highlight_author:
+        return "<b>" + process_author_name(author) + "</b>"
+    return unidecode(process_author_name(author))
+
+#html for the author list of an entry, each separated by a comma and the last one followed by end
+def format_authors(author_field, end):
+    authors = author_field.split(' and ')
+    last = authors[-1]
+    #don't write a comma after the last author
+    return ''.join(format_author(author) + (", " if author != last else end) for author in authors)
 
 #process title
 #a function that takes title, puts it in double quotes and removes curly brackets
@@ -73,156 +171,216 @@ def process_title(title, quotes=True):
     if quotes:
         title = '"' + title + '"'
     return title
-def generate_teaser(size, html_file, bibtex_database):
-    counter = 0
-    for entry in bibtex_database.entries[0:size]:
-            html_file.write("""<ul>
-        <li class="row" id="extra-info-text">
-            <div class="col s12 l12">
-                <!--TEASER IMAGES here-->
-            </div>
-            <p class="col s12 m12 l12" id = "extra-info-text">""")
-                #go over all the authors and add them to the html file if author name is 'Alper Sahistan' make it bold
-                #make shorten first names to initials and add a period
-            for author in entry['author'].split(' and '):
-                if author == 'Sahistan, Alper':
-                    html_file.write("<b>" + process_author_name(author) + "</b>")
-                else:
-                    html_file.write(unidecode(process_author_name(author)))
-                #don't write a comma after the last author
-                if author != entry['author'].split(' and ')[-1]:
-                    html_file.write(", ")
-                else:
-                    html_file.write(" \n\t\t\t\t\t\t")
-
-            html_file.write(process_title(entry['title'], True) + " \n\t\t\t\t\t\t")
-            html_file.write("<b>" + entry['booktitle'] + "</b>\n")
-            html_file.write('<a href= + LINK HERE> <i class="material-icons icon-light">picture_as_pdf</i></a>')
-            html_file.write('<a class=" modal-trigger" href="#modal' + str(counter) + '"><i class="icon-light" style="font-family: Source Code Pro">BibTeX</i></a></p>')
-            html_file.write("""\n\t\t</li>\n</ul>\n""")
-
-            html_file.write('<!-- Modal -->\n')
-            html_file.write('<div id="modal' + str(counter) + '" class="modal">\n')
-            html_file.write("""\t <div class="modal-content" id="citation-box">\n
-            \t\t<h4>BibTeX citation</h4>\n
-            \t\t\t<div class="card-panel" id ="citation-text">\n
-            \t\t\t\t<p type="text" id="paper"""+ str(counter) + '">')
-            
-            bibtex_str = bibtex_list[4-counter]
-            html_file.write("@" + bibtex_str)
-            html_file.write("""</p>
-            </div>
-            <div class="row">
-            <div class="col m11"></div>
-            <a class="button col m1" onclick="copyToClipboard('paper""" + str(counter) + """')"\n""")
-            html_file.write(""" style="position: absolute; right: 0;"><i class="material-icons">copy_all</i></a>
-            </div>
-        </div>
-        </div>\n""")
-            counter += 1
-
-def generate_pubs(html_file, bibtex_database):
+
+#bibtex text shown in the modal of a publication card
+def format_bibtex(entry):
+    fields = ''.join("\t" + key + " = {" + entry[key] + "},\n"
+                     for key in entry.keys() if key != 'ID' and key != 'ENTRYTYPE')
+    return "@" + entry['ID'] + "{" + entry['ID'] + ",\n" + fields + "}\n"
+
+#bibtex text shown in the modal of a teaser, as written by BibTexWriter (without the leading '@')
+def format_teaser_bibtex(entry):
+    writer = BibTexWriter()
+    writer.contents = ['entries']
+    writer.indent = '  '
+    database = BibDatabase()
+    database.entries = [entry]
+    return bibtexparser.dumps(database, writer)[1:] + "\n"
+
+#sort key: year and month descending, then author name (see load_bibtex)
+def entry_sort_key(entry):
+    return (entry['year'], month_ranks[entry['month'].lower()], entry['author'])
+
+#html of a single teaser and its modal
+def render_teaser_entry(entry, counter):
+    #go over all the authors and add them to the html file if author name is 'Alper Sahistan' make it bold
+    #make shorten first names to initials and add a period
+    return (teaser_head_template
+            + format_authors(entry['author'], " \n\t\t\t\t\t\t")
+            + teaser_body_template.format(
+                title=process_title(entry['title'], True),
+                booktitle=entry['booktitle'],
+                counter=counter,
+                bibtex=format_teaser_bibtex(entry)))
+
+#html of a single publication card and its modal
+def render_card_entry(entry, counter):
+    #go over all the authors and add them to the html file if author name is 'Alper Sahistan' make it bold
+    return (card_head_template.format(
+                title=process_title(entry['title'], False),
+                booktitle=entry['booktitle'])
+            + format_authors(entry['author'], "</p>\n")
+            + card_body_template.format(counter=counter, bibtex=format_bibtex(entry)))
+
+def generate_teaser(size, bibtex_database):
+    return ''.join(render_teaser_entry(entry, counter)
+                   for counter, entry in enumerate(bibtex_database.entries[0:size]))
+
+#assemble the publication list from (year, card html) pairs, inserting a header whenever the year changes
+def assemble_pubs(years_and_cards):
     #Get the current year
     current_year = datetime.datetime.now().year
-    first_pub_year = int(bibtex_database.entries[-1]['year'])
 
-    html_file.write("""<div class="col s12 m12">
-        \t<h2>"""+ str(current_year) +"""</h2>
-        \t<hr>\n""")
-    counter = 0
+    parts = [pubs_head_template.format(year=current_year)]
     #go over all the publications from bibtex_database
-    for entry in bibtex_database.entries:
+    for year, card in years_and_cards:
         #if the year of the publication is the same as the current year
-        if entry['year'] != str(current_year):
+        if year != str(current_year):
             #decremenet the current year until it matches the year of the publication
-            while entry['year'] != str(current_year):
+            while year != str(current_year):
                 current_year -= 1
-                html_file.write("""
-                \t<h2>"""+ str(current_year) +"""</h2>
-                \t<hr>\n""")
-
-        html_file.write("""\t\t<div class="row">
-        \t\t\t<div class="col s12 m12">
-        \t\t\t\t<div class="card" style="background-color:#1c415b;">
-        \t\t\t\t\t<div class="card-content white-text">
-        \t\t\t\t\t\t<div class="row">
-        \t\t\t\t\t\t\t<div class="col s6 m6">
-        \t\t\t\t\t\t\t\t<!--Teaser Images here-->
-        \t\t\t\t\t\t\t</div>
-        \t\t\t\t\t\t</div>\n""")
-        html_file.write("""\t\t\t\t\t\t<span class="card-title">""" 
-        +process_title(entry['title'], False)+"""</span>
-        \t\t\t\t\t\t<p><i>"""+ entry['booktitle'] +"""</i></p>\n""")
-        html_file.write("""\t\t\t\t\t\t<p>Authors: """)
-        #go over all the authors and add them to the html file if author name is 'Alper Sahistan' make it bold
-        for author in entry['author'].split(' and '):
-                if author == 'Sahistan, Alper':
-                    html_file.write("<b>" + process_author_name(author) + "</b>")
-                else:
-                    html_file.write(unidecode(process_author_name(author)))
-                #don't write a comma after the last author
-                if author != entry['author'].split(' and ')[-1]:
-                    html_file.write(", ")
-                else:
-                    html_file.write("</p>\n")
-        html_file.write("""\t\t\t\t\t</div>
-        \t\t\t\t\t<div class="card-action">
-        \t\t\t\t\t\t<a href= + LINK HERE> <i class="material-icons icon-light">picture_as_pdf</i></a>
-        \t\t\t\t\t\t<a class=" modal-trigger" href="#modal"""+ str(counter) + """"><i class="icon-light" style="font-family: Source Code Pro; text-transform: none">BibTeX</i></a>
-        \t\t\t\t\t</div>
-        \t\t\t\t</div>
-        \t\t\t</div>
-        \t\t</div>\n""")
-        html_file.write('\t\t<!-- Modal -->\n')
-        html_file.write('\t\t<div id="modal' + str(counter) + '" class="modal">\n')
-        html_file.write("""\t\t\t <div class="modal-content" id="citation-box">
-        \t\t\t\t<h4>BibTeX citation</h4>
-        \t\t\t\t\t<div class="card-panel" id ="citation-text">
-        \t\t\t\t\t\t<p type="text" id="paper"""+ str(counter) + '">\n')
-        html_file.write("@" + entry['ID'] + "{" + entry['ID'] + ",\n")
-        for key in entry.keys():
-            if key != 'ID' and key != 'ENTRYTYPE':
-                html_file.write("\t" + key + " = {" + entry[key] + "},\n")
-        html_file.write("}\n")
-        html_file.write("""\t\t\t\t\t\t</p>
-        \t\t\t\t\t</div>
-        \t\t\t\t\t<div class="row">
-        \t\t\t\t\t\t<div class="col m11"></div>
-        \t\t\t\t\t\t<a class="button col m1" onclick="copyToClipboard('paper""" + str(counter) + """')"\n""")
-        html_file.write("""\t\t\t\t\t\t style="position: absolute; right: 0;"><i class="material-icons">copy_all</i></a>
-        \t\t\t\t\t</div>
-        \t\t\t</div>
-        \t\t</div>\n""")
-        counter+=1
-    html_file.write("""</div>\n""")
-
-
-
-
-#open the bibtex file and read the lines
-with open(file_name) as bibtex_file:
-    bibtex_database = bibtexparser.load(bibtex_file)
+                parts.append(year_template.format(year=current_year))
+        parts.append(card)
+    parts.append("""</div>\n""")
+    return ''.join(parts)
+
+def generate_pubs(bibtex_database):
+    return assemble_pubs((entry['year'], render_card_entry(entry, counter))
+                         for counter, entry in enumerate(bibtex_database.entries))
+
+#parse the bibtex file and sort it newest first
+def load_bibtex(file_name):
+    with open(file_name) as bibtex_file:
+        bibtex_database = bibtexparser.load(bibtex_file)
     #sort entries by first year and then month and then auhors name. year and month is descending order and author name is ascending order. Use the month_ranks dictionary to convert month to a number
-    bibtex_database.entries.sort(key=lambda x: (x['year'], month_ranks[x['month'].lower()], x['author']), reverse=True)
+    bibtex_database.entries.sort(key=entry_sort_key, reverse=True)
+    return bibtex_database
 
-    writer = BibTexWriter()
-    writer.contents = ['entries']
-    writer.indent = '  '
-    writer.order_entries_by = ('year', 'month', 'author')
-    #give first element of the bibtext entry to the writer
-    bibtex_str = bibtexparser.dumps(bibtex_database, writer)
-    bibtex_list = bibtex_str.split('@')
+#render the whole page into one string
+def render_html(bibtex_database, print_teaser=True, print_pubs=True):
+    parts = []
+    if print_teaser:
+        parts.append("<!-- Teaser -->\n")
+        parts.append(generate_teaser(3, bibtex_database))
 
-    #create the html file
-    html_file_name = file_name[:-len(bibtex_database.entries)] + ".html"
-    html_file = open(html_file_name, 'w')
+    if print_pubs:
+        parts.append("<!-- Full Pubs -->\n")
+        parts.append(generate_pubs(bibtex_database))
+    return ''.join(parts)
+
+#incremental builds
+#the .bib text is split into entry chunks; each chunk is hashed together with the
+#templates and any @string/@preamble definitions, and its rendered fragments are kept
+#in <name>.fragments.json. Only chunks whose hash is not in the cache are parsed and
+#rendered. Fragments are stored with counter_token in place of the modal number.
+counter_token = '\x00counter\x00'
+fragment_cache_version = 1
+entry_start_re = re.compile(r'^(?=[ \t]*@)', re.MULTILINE)
+chunk_type_re = re.compile(r'\s*@\s*(\w+)')
+
+def split_bibtex_chunks(text):
+    prelude = []
+    entries = []
+    for chunk in entry_start_re.split(text):
+        match = chunk_type_re.match(chunk)
+        if not match:
+            continue
+        entry_type = match.group(1).lower()
+        if entry_type in ('string', 'preamble'):
+            prelude.append(chunk)
+        elif entry_type != 'comment':
+            entries.append(chunk)
+    return ''.join(prelude), entries
+
+def render_fragments(entry):
+    return {
+        'year': entry['year'],
+        'sort': list(entry_sort_key(entry)),
+        'teaser': render_teaser_entry(entry, counter_token),
+        'card': render_card_entry(entry, counter_token),
+    }
+
+def load_fragment_cache(cache_file_name):
+    try:
+        with open(cache_file_name) as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != fragment_cache_version:
+        return {}
+    return cache['fragments']
+
+#render the page reusing cached fragments of unchanged entries
+def render_html_incremental(file_name, print_teaser=True, print_pubs=True, cache_file_name=None):
+    if cache_file_name is None:
+        cache_file_name = os.path.splitext(file_name)[0] + ".fragments.json"
+    with open(file_name) as bibtex_file:
+        prelude, chunks = split_bibtex_chunks(bibtex_file.read())
+
+    templates = ''.join([teaser_head_template, teaser_body_template, card_head_template,
+                         card_body_template, highlight_author])
+    context = hashlib.sha1((templates + prelude).encode('utf-8')).hexdigest()
 
+    cached = load_fragment_cache(cache_file_name)
+    fragments = {}
+    rendered = 0
+    for chunk in chunks:
+        key = hashlib.sha1((context + chunk).encode('utf-8')).hexdigest()
+        if key in fragments:
+            continue
+        if key in cached:
+            fragments[key] = cached[key]
+            continue
+        entries = bibtexparser.loads(prelude + chunk).entries
+        if entries:
+            fragments[key] = render_fragments(entries[0])
+            rendered += 1
+
+    if rendered or len(fragments) != len(cached):
+        with open(cache_file_name, 'w') as cache_file:
+            json.dump({'version': fragment_cache_version, 'fragments': fragments}, cache_file)
+    print(f"Rendered {rendered} new or changed entries, reused {len(fragments) - rendered}")
+
+    ordered = sorted(fragments.values(), key=lambda f: tuple(f['sort']), reverse=True)
+    parts = []
     if print_teaser:
-        html_file.write("<!-- Teaser -->\n")
-        generate_teaser(3, html_file, bibtex_database)
-    
+        parts.append("<!-- Teaser -->\n")
+        parts.extend(f['teaser'].replace(counter_token, str(counter))
+                     for counter, f in enumerate(ordered[0:3]))
     if print_pubs:
-        html_file.write("<!-- Full Pubs -->\n")
-        generate_pubs(html_file, bibtex_database)
-    
+        parts.append("<!-- Full Pubs -->\n")
+        parts.append(assemble_pubs((f['year'], f['card'].replace(counter_token, str(counter)))
+                                   for counter, f in enumerate(ordered)))
+    return ''.join(parts)
+
+#read the bibtex file and write <name>.html next to it, returns the html file name
+def create_paper_html(file_name, print_teaser=True, print_pubs=True, incremental=False):
+    if incremental:
+        html = render_html_incremental(file_name, print_teaser, print_pubs)
+    else:
+        bibtex_database = load_bibtex(file_name)
+        html = render_html(bibtex_database, print_teaser, print_pubs)
+
+    #create the html file
+    html_file_name = os.path.splitext(file_name)[0] + ".html"
+    with open(html_file_name, 'w') as html_file:
+        html_file.write(html)
+    return html_file_name
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    print_pubs = True
+    print_teaser = True
+    incremental = False
+
+    file_name = argv[1]
+    #check if more parameters are given
+    for arg in argv[2:]:
+        #if its "-t-only" or "--teaser-only" then set print_pubs to false
+        if arg == "-t-only" or arg == "--teaser-only":
+            print_pubs = False
+        #if its "-p-only" or "--pubs-only" then set print_teaser to false
+        elif arg == "-p-only" or arg == "--pubs-only":
+            print_teaser = False
+        #if its "-i" or "--incremental" then reuse cached fragments of unchanged entries
+        elif arg == "-i" or arg == "--incremental":
+            incremental = True
+        else:
+            print("Invalid parameter")
+            sys.exit()
+
+    create_paper_html(file_name, print_teaser, print_pubs, incremental)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the conversion scripts.
+
+    python -m volconv <command> [args...]
+    python -m volconv worker < jobs.txt
+
+Each command is the CLI of one of the scripts; its module (and with it NumPy,
+tifffile, ...) is only imported when the command is run. The worker command
+keeps one interpreter alive and runs one job per stdin line, so the import cost
+is paid once for many conversions.
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import shlex
+import sys
+import time
+
+# command -> (module, function, help); the function takes an argv list without the program name
+COMMANDS = {
+    'tif2raw': ('format_converters.tif2raw', '_cli', 'Convert a TIFF stack to a raw volume'),
+    'stack2raw': ('format_converters.tifstack2raw', '_cli', 'Stack TIFF slices with a common prefix into a raw volume'),
+    'tif2vtk': ('format_converters.tifstack2VTK', 'main', 'Convert a TIFF stack to VTK'),
+    'raw2vtk': ('format_converters.raw2VTK', 'main', 'Convert a raw volume to VTK without loading it'),
+    'swap-endian': ('byte_manipulators.swap_endian', 'main', 'Swap the byte order of a raw volume'),
+    'reorder': ('byte_manipulators.reorder_axes', 'main', 'Permute/flip the axes of a raw volume out of core'),
+    'pipeline': ('byte_manipulators.raw_pipeline', 'main', 'Swap/cast/flip/crop/stride a raw volume in one pass'),
+    'verify': ('byte_manipulators.checksums', 'main', 'Check files against a checksum manifest'),
+    'convert-bytes': ('byte_manipulators.byte_converter', 'main', 'Convert the element type of a binary file'),
+    'grid': ('mock_data_gen.createGrid', 'main', 'Generate a 3D gradient test grid'),
+    'bibformat': ('oddly_specific.bib_format', 'main', 'Normalize citation keys of .bib files'),
+    'paperhtml': ('oddly_specific.create_paper_html', 'main', 'Create a publication list HTML from a .bib file'),
+}
+
+# Entry points that still expect sys.argv-style lists (program name first)
+ARGV0_COMMANDS = {'paperhtml'}
+
+
+def run_command(command, args):
+    """Import the module of command on first use and run it with args."""
+    if command not in COMMANDS:
+        raise ValueError(f"Unknown command '{command}' (choose from {', '.join(COMMANDS)})")
+    module_name, func_name, _ = COMMANDS[command]
+    func = getattr(importlib.import_module(module_name), func_name)
+    if command in ARGV0_COMMANDS:
+        args = [command] + list(args)
+    return func(list(args))
+
+
+def _parse_job(line):
+    """A job line is either JSON {"id", "command", "args"} or a shell-quoted command line."""
+    if line.lstrip().startswith('{'):
+        job = json.loads(line)
+        return job.get('id'), job['command'], job.get('args', [])
+    words = shlex.split(line)
+    return None, words[0], words[1:]
+
+
+@contextlib.contextmanager
+def _job_streams():
+    """Run a job with an empty stdin and its stdout sent to stderr.
+
+    File descriptor 1 is pointed at stderr as well, so worker processes the
+    command starts (spawned or forked) cannot write into the responses.
+    """
+    saved_stdin, sys.stdin = sys.stdin, io.StringIO()
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    try:
+        os.dup2(2, 1)
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+        sys.stdin = saved_stdin
+
+
+def worker(stdin=None, stdout=None):
+    """Run jobs from stdin until EOF, answering each with one JSON line on stdout.
+
+    The commands' own output goes to stderr so that stdout only carries the
+    {"id", "ok", "error", "seconds"} responses. Jobs see an empty stdin, so a
+    command that would prompt for input fails instead of reading the next jobs.
+    """
+    stdin = stdin or sys.stdin
+    # Responses go to a copy of the original stdout descriptor
+    stdout = stdout or os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    for number, line in enumerate(stdin, 1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        job_id, error = number, None
+        start = time.perf_counter()
+        try:
+            parsed_id, command, args = _parse_job(line)
+            if parsed_id is not None:
+                job_id = parsed_id
+            with _job_streams():
+                run_command(command, args)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                error = f"exited with status {e.code}"
+        except EOFError:
+            error = "command asked for interactive input, pass its arguments on the job line"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        response = {'id': job_id, 'ok': error is None, 'error': error,
+                    'seconds': round(time.perf_counter() - start, 6)}
+        stdout.write(json.dumps(response) + '\n')
+        stdout.flush()
+
+
+def _usage():
+    lines = ["Usage: python -m volconv <command> [args...]", "", "Commands:"]
+    for name, (_, _, text) in COMMANDS.items():
+        lines.append(f"  {name:<14}{text}")
+    lines.append(f"  {'worker':<14}Run many jobs from stdin (one command line or JSON object per line)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] in ('-h', '--help'):
+        print(_usage())
+        return 0 if argv else 1
+    command, args = argv[0], argv[1:]
+    if command == 'worker':
+        worker()
+        return 0
+    if command not in COMMANDS:
+        print(f"Unknown command '{command}'\n")
+        print(_usage())
+        return 1
+    result = run_command(command, args)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())